@@ -24,7 +24,13 @@ from src.custom import (
 # from src.custom import SERVER_HOST
 # from src.custom import SERVER_PORT
 from src.custom import TEXT_REPLACEMENT
+from src.downloader import Downloader
+from src.extract import Extractor
+from src.manager import BlobStore
+from src.manager import RedirectCache
+from src.manager import ResponseArchive
 from src.manager import Database
+from src.manager import DownloadQueue
 from src.manager import DownloadRecorder
 from src.module import Cookie
 from src.module import Register
@@ -67,6 +73,10 @@ class TikTokDownloader:
         self.console = ColorfulConsole()
         self.logger = None
         self.recorder = None
+        self.queue = None
+        self.blob = None
+        self.archive = None
+        self.redirect = None
         self.settings = Settings(PROJECT_ROOT, self.console)
         self.event = Event()
         self.cookie = Cookie(self.settings, self.console)
@@ -102,6 +112,8 @@ class TikTokDownloader:
         if self.parameter:
             await self.parameter.close_client()
             self.close()
+        Extractor.shutdown()
+        Downloader.writer.shutdown()
 
     def __update_menu(self):
         options = {
@@ -205,6 +217,10 @@ class TikTokDownloader:
             self.database,
             self.config["Record"],
             self.console, )
+        self.queue = DownloadQueue(self.database)
+        self.blob = BlobStore(self.database)
+        self.archive = ResponseArchive(self.database)
+        self.redirect = RedirectCache(self.database)
         self.logger = {1: LoggerManager, 0: BaseLogger}[self.config["Logger"]]
 
     async def check_update(self):
@@ -339,6 +355,10 @@ class TikTokDownloader:
             console=self.console,
             **self.settings.read(),
             recorder=self.recorder,
+            queue=self.queue,
+            blob=self.blob,
+            archive=self.archive,
+            redirect=self.redirect,
         )
         self.parameter.set_headers_cookie()
         self.restart_cycle_task(restart, )
@@ -1,9 +1,19 @@
+from asyncio import Queue
+from asyncio import Semaphore
+from asyncio import TaskGroup
+from asyncio import create_task
+from asyncio import gather
+from asyncio import wait
+from collections import deque
+from contextlib import AsyncExitStack
+from contextlib import nullcontext
 from datetime import date
 from datetime import datetime
 from pathlib import Path
 from platform import system
 from time import time
 from types import SimpleNamespace
+from typing import AsyncIterator
 from typing import Callable
 from typing import TYPE_CHECKING
 from typing import Union
@@ -11,7 +21,11 @@ from typing import Union
 from pydantic import ValidationError
 
 # from ..custom import failure_handling
+from ..custom import ACCOUNT_WORKERS
+from ..custom import DETAIL_WORKERS
+from ..custom import PIPELINE_SIZE
 from ..custom import suspend
+from ..custom import suspend_policy
 from ..downloader import Downloader
 from ..extract import Extractor
 from ..interface import (
@@ -143,6 +157,9 @@ class TikTok:
             (_("批量下载合集作品(TikTok)"), self.mix_interactive_tiktok,),
             (_("获取直播推流地址(TikTok)"), self.live_interactive_tiktok,),
             # (_("采集作品评论数据(TikTok)"), self.comment_interactive_tiktok,),
+            (_("恢复未完成的下载任务"), self.resume_download_tasks,),
+            (_("合并 XLSX 数据分片文件"), self.consolidate_xlsx_data,),
+            (_("重新提取已归档的接口数据"), self.replay_archive_data,),
         )
         self.__function_account = (
             (_("使用 accounts_urls 参数的账号链接(推荐)"), self.account_detail_batch),
@@ -279,11 +296,51 @@ class TikTok:
             params_name: str,
             tiktok: bool,
     ) -> None:
+        """同时处理多个账号，最多同时处理 ACCOUNT_WORKERS 个账号，所有账号共享进度条"""
         count = SimpleNamespace(time=time(), success=0, failed=0)
         self.logger.info(_("共有 {count} 个账号的作品等待下载").format(count=len(accounts)))
-        for index, data in enumerate(accounts, start=1):
-            if hasattr(data, "enable") and not data.enable:
-                continue
+        workers = Semaphore(ACCOUNT_WORKERS)
+        batches, rest_time = suspend_policy()
+        # 暂停计数仅统计实际处理的账号，不包括已禁用的账号
+        enabled = [
+            (index, data) for index, data in enumerate(accounts, start=1)
+            if not (hasattr(data, "enable") and not data.enable)
+        ]
+        progress = self.downloader.progress_object()
+        with progress:
+            async with TaskGroup() as group:
+                running = set()
+                for processed, (index, data) in enumerate(enabled, start=1):
+                    await workers.acquire()
+                    task = group.create_task(self.__account_detail_task(
+                        index,
+                        data,
+                        params_name,
+                        tiktok,
+                        count,
+                        progress,
+                        workers,
+                    ))
+                    running.add(task)
+                    task.add_done_callback(running.discard)
+                    if processed != len(enabled) and batches and rest_time and not processed % batches:
+                        # 等待正在处理的账号全部结束后暂停
+                        if running:
+                            await wait(running)
+                        await suspend(processed, self.console)
+        self.__summarize_results(count, _("账号"), )
+
+    async def __account_detail_task(
+            self,
+            index: int,
+            data: SimpleNamespace,
+            params_name: str,
+            tiktok: bool,
+            count: SimpleNamespace,
+            progress,
+            workers: Semaphore,
+    ) -> None:
+        try:
             if not (sec_user_id := await self.check_sec_user_id(
                     data.url,
                     tiktok,
@@ -295,19 +352,23 @@ class TikTok:
                         url=data.url,
                     ))
                 count.failed += 1
-                continue
+                return
             if not await self.deal_account_detail(
                     index,
                     **vars(data) | {"sec_user_id": sec_user_id},
                     tiktok=tiktok,
+                    progress=progress,
             ):
                 count.failed += 1
-                continue
-            # break  # 调试代码
+                return
             count.success += 1
-            if index != len(accounts):
-                await suspend(index, self.console)
-        self.__summarize_results(count, _("账号"), )
+        except Exception as e:
+            # 单个账号处理异常不影响其他账号
+            self.logger.error(
+                _("处理第 {index} 个账号时发生预期之外的错误：{error}").format(index=index, error=repr(e), ))
+            count.failed += 1
+        finally:
+            workers.release()
 
     async def check_sec_user_id(self, sec_user_id: str, tiktok=False, ) -> str:
         match tiktok:
@@ -406,6 +467,7 @@ class TikTok:
             cookie: str = None,
             proxy: str = None,
             tiktok=False,
+            progress=None,
             *args,
             **kwargs,
     ):
@@ -423,6 +485,20 @@ class TikTok:
             )):
                 self.logger.warning(_("{sec_user_id} 获取账号信息失败").format(sec_user_id=sec_user_id))
                 return
+        if not (api or source):
+            return await self._pipeline_account_detail(
+                sec_user_id,
+                mark,
+                tab,
+                earliest,
+                latest,
+                pages,
+                cookie,
+                proxy,
+                tiktok,
+                info,
+                progress,
+            )
         acquirer = self._get_account_data_tiktok if tiktok else self._get_account_data
         account_data, earliest, latest = await acquirer(
             cookie=cookie,
@@ -454,6 +530,189 @@ class TikTok:
             info=info,
         )
 
+    async def _pipeline_account_detail(
+            self,
+            sec_user_id: str,
+            mark: str,
+            tab: str,
+            earliest: str,
+            latest: str,
+            pages: int,
+            cookie: str,
+            proxy: str,
+            tiktok: bool,
+            info: dict = None,
+            progress=None,
+    ):
+        """流水线处理账号作品，每获取一页数据即进行提取、记录与下载，各阶段之间使用有界队列；
+        传入已启动的进度条时，由外部负责启动和关闭"""
+        pages_queue = Queue(PIPELINE_SIZE)
+        works_queue = Queue(PIPELINE_SIZE)
+        progress = progress or self.downloader.progress_object()
+        state = SimpleNamespace(
+            id_="",
+            name="",
+            mark=mark,
+            mode=tab,
+            tiktok=tiktok,
+            info=info,
+            sec_user_id=sec_user_id,
+            received=False,
+            downloaded=False,
+            count=self.downloader.generate_count(),
+        )
+        account = (AccountTikTok if tiktok else Account)(
+            self.parameter,
+            cookie,
+            proxy,
+            sec_user_id,
+            tab,
+            earliest,
+            latest,
+            pages,
+            progress=progress,
+            page_callback=pages_queue.put,
+        )
+        self.logger.info(_("开始提取作品数据"))
+        with nullcontext() if progress.live.is_started else progress:
+            async with TaskGroup() as group:
+                group.create_task(self.__pipeline_acquire(account, pages_queue, ))
+                group.create_task(self.__pipeline_extract(account, pages_queue, works_queue, state, ))
+                group.create_task(self.__pipeline_download(works_queue, state, progress, ))
+        if not state.received:
+            return None
+        if state.downloaded:
+            self.downloader.statistics_count(state.count)
+        return True
+
+    @staticmethod
+    async def __pipeline_acquire(account: Account, pages: Queue, ):
+        await account.run()
+        await pages.put(None)
+
+    async def __pipeline_extract(
+            self,
+            account: Account,
+            pages: Queue,
+            works: Queue,
+            state: SimpleNamespace,
+    ):
+        async with AsyncExitStack() as stack:
+            # 无法确定账号信息的数据页暂存至 deferred，账号信息无效时为 None
+            recorder, deferred = None, []
+            while (page := await pages.get()) is not None:
+                if recorder:
+                    await self.__pipeline_extract_page(account, page, works, state, recorder, )
+                    continue
+                if deferred is None or not page:
+                    # 继续读取剩余数据页，避免获取数据的任务阻塞
+                    continue
+                deferred.append(page)
+                if recorder := await self.__pipeline_recorder(stack, page, state, ):
+                    state.received = True
+                    for i in deferred:
+                        await self.__pipeline_extract_page(account, i, works, state, recorder, )
+                    deferred = []
+                elif state.info:
+                    deferred = None
+            if deferred is None or deferred:
+                self.logger.warning(_("{sec_user_id} 提取账号信息失败").format(sec_user_id=state.sec_user_id))
+        await works.put(None)
+
+    async def __pipeline_extract_page(
+            self,
+            account: Account,
+            page: list[dict],
+            works: Queue,
+            state: SimpleNamespace,
+            recorder,
+    ):
+        if data := await self.extractor.run(
+                page,
+                recorder,
+                type_="batch",
+                tiktok=state.tiktok,
+                name=state.name,
+                mark=state.mark,
+                earliest=account.earliest,
+                latest=account.latest,
+                same=state.mode in {
+                    "post",
+                    "mix",
+                },
+        ):
+            await works.put(data)
+
+    async def __pipeline_recorder(
+            self,
+            stack: AsyncExitStack,
+            data: list[dict],
+            state: SimpleNamespace,
+    ):
+        """根据账号信息或数据页确定账号信息并创建数据记录对象；数据页为空或缺少账号信息时返回 None"""
+        if not (state.info or data):
+            return None
+        try:
+            result = self.extractor.preprocessing_data(
+                state.info or data,
+                state.tiktok,
+                state.mode,
+                state.mark,
+                state.sec_user_id,
+            )
+        except TikTokDownloaderError:
+            return None
+        if not (result and result[0]):
+            return None
+        state.id_, state.name, state.mark = result
+        self.__display_extracted_information(state.id_, state.name, state.mark, )
+        prefix = self._generate_prefix(state.mode)
+        suffix = self._generate_suffix(state.mode)
+        old_mark = f"{m['MARK']}_{suffix}" if (
+            m := await self.cache.has_cache(state.id_)
+        ) else None
+        root, params, logger = self.record.run(self.parameter)
+        recorder = await stack.enter_async_context(logger(
+            root,
+            name=f"{prefix}{state.id_}_{state.mark}_{suffix}",
+            old=old_mark,
+            console=self.console,
+            **params,
+        ))
+        await self.cache.update_cache(
+            self.parameter.folder_mode,
+            prefix,
+            suffix,
+            state.id_,
+            state.name,
+            state.mark,
+        )
+        return recorder
+
+    async def __pipeline_download(
+            self,
+            works: Queue,
+            state: SimpleNamespace,
+            progress,
+    ):
+        while (data := await works.get()) is not None:
+            if not self.downloader.download:
+                continue
+            if not state.downloaded:
+                # 每个账号仅输出一次提示
+                self.logger.info(_("开始下载作品文件"))
+                state.downloaded = True
+            await self.downloader.run_batch(
+                data,
+                state.tiktok,
+                mode=state.mode,
+                mark=state.mark,
+                user_id=state.id_,
+                user_name=state.name,
+                progress=progress,
+                count=state.count,
+            )
+
     async def _get_account_data(
             self,
             cookie: str = None,
@@ -608,7 +867,7 @@ class TikTok:
                 },
             )
         if api:
-            return data
+            return self.extractor.clean_internal_data(data)
         await self.cache.update_cache(
             self.parameter.folder_mode,
             prefix,
@@ -804,23 +1063,79 @@ class TikTok:
             cookie: str = None,
             proxy: str = None,
     ):
-        detail_data = [
-            await request_obj(
-                self.parameter,
-                cookie,
-                proxy,
-                i,
-            ).run() for i in ids
-        ]
-        if not any(detail_data):
-            return None
+        """并发获取作品数据，按作品 ID 顺序逐批提取与下载已获取的作品"""
+        details = self.__iter_detail(request_obj, ids, cookie, proxy, )
         if source:
-            return detail_data
-        detail_data = await self.extractor.run(detail_data, record, tiktok=tiktok, )
+            return [i async for chunk in details for i in chunk] or None
+        result, files = [], None
+        count = self.downloader.generate_count()
+        progress = self.downloader.progress_object()
+        download = not api and self.downloader.download
+        with nullcontext() if api else progress:
+            async for chunk in details:
+                data = await self.extractor.run(chunk, record, tiktok=tiktok, )
+                result.extend(data)
+                if download and data:
+                    if not files:
+                        # 每批作品仅输出一次提示
+                        self.logger.info(_("开始下载作品文件"))
+                    files = await self.downloader.run_general(
+                        data,
+                        tiktok,
+                        progress=progress,
+                        count=count,
+                    ) or files
+        if not result:
+            return None
         if api:
-            return detail_data
-        file_name, file_path = await self.downloader.run(detail_data, "detail", tiktok=tiktok)
-        return self._get_preview_image(detail_data[0]), file_name, file_path
+            return self.extractor.clean_internal_data(result)
+        if files:
+            self.downloader.statistics_count(count)
+        return self._get_preview_image(result[0]), *(files or (None, None))
+
+    async def __iter_detail(
+            self,
+            request_obj: Callable,
+            ids: list[str],
+            cookie: str = None,
+            proxy: str = None,
+    ) -> AsyncIterator[list[dict]]:
+        """最多同时获取 DETAIL_WORKERS 个作品数据，按作品 ID 顺序逐批返回已获取的数据，获取失败的作品不会返回；
+        已创建但尚未返回的任务数量不超过 DETAIL_WORKERS 的两倍"""
+        workers = Semaphore(DETAIL_WORKERS)
+
+        async def fetch(id_: str):
+            async with workers:
+                return await request_obj(
+                    self.parameter,
+                    cookie,
+                    proxy,
+                    id_,
+                ).run()
+
+        tasks = deque()
+        ids = iter(ids)
+
+        def fill():
+            while len(tasks) < DETAIL_WORKERS * 2 and (id_ := next(ids, None)) is not None:
+                tasks.append(create_task(fetch(id_)))
+
+        try:
+            fill()
+            while tasks:
+                await tasks[0]
+                chunk = []
+                while tasks and tasks[0].done():
+                    if data := tasks.popleft().result():
+                        chunk.append(data)
+                fill()
+                if chunk:
+                    yield chunk
+        finally:
+            # 提前结束时取消并等待尚未完成的任务
+            for task in tasks:
+                task.cancel()
+            await gather(*tasks, return_exceptions=True, )
 
     @staticmethod
     def _get_preview_image(data: dict) -> str:
@@ -1019,20 +1334,33 @@ class TikTok:
         else:
             for i in ids:
                 name = _("作品{id}_评论数据").format(id=i)
-                if d := await Comment(
-                        self.parameter,
-                        cookie,
-                        proxy,
-                        item_id=i,
-                        reply=False,
-                ).run():
+                pages = Comment(
+                    self.parameter,
+                    cookie,
+                    proxy,
+                    item_id=i,
+                    reply=False,
+                ).iter_run()
+                if first := await anext(pages, None):
                     root, params, logger = self.record.run(self.parameter, type_="comment")
                     async with logger(root, name=name, console=self.console, **params) as record:
-                        await self.extractor.run(d, record, type_="comment")
+                        async for _i in self.extractor.iter_run(
+                                self.__chain_pages(first, pages),
+                                record,
+                                type_="comment",
+                        ):
+                            pass
                     self.logger.info(_("作品评论数据已储存至 {filename}").format(filename=name))
                 else:
                     self.logger.warning(_("采集评论数据失败"))
 
+    @staticmethod
+    async def __chain_pages(first: list[dict], pages: AsyncIterator[list[dict]], ):
+        """将已读取的首页数据与后续数据页合并为一个数据页序列"""
+        yield first
+        async for page in pages:
+            yield page
+
     async def mix_interactive(self, select="", ):
         await self.__secondary_menu(
             _("请选择合集链接来源"),
@@ -1689,6 +2017,49 @@ class TikTok:
     ):
         await HashTag(self.parameter, cookie, proxy, ).run()
 
+    async def resume_download_tasks(self, *args, **kwargs, ):
+        await self.downloader.run_resume()
+        self.logger.info(_("已退出恢复未完成的下载任务模式"))
+
+    async def consolidate_xlsx_data(self, *args, **kwargs, ):
+        if not (result := self.record.consolidate_xlsx(self.parameter)):
+            self.logger.info(_("没有需要合并的 XLSX 数据分片文件"))
+        for path, count in result.items():
+            self.logger.info(_("已合并 {count} 条数据至 {path}").format(count=count, path=path))
+
+    async def replay_archive_data(
+            self,
+            *args,
+            host: str = None,
+            endpoint: str = None,
+            id_: str = None,
+            since: int = None,
+    ):
+        """读取已归档的接口响应数据重新提取并储存，不请求接口；可按接口主机、接口路径、ID、归档时间筛选"""
+        count = 0
+        async with AsyncExitStack() as stack:
+            recorders = {}
+            async for type_, tiktok, data in self.parameter.archive.replay(
+                    host,
+                    endpoint,
+                    id_,
+                    since,
+                    self.logger.warning,
+            ):
+                if type_ not in recorders:
+                    root, params, logger = self.record.run(self.parameter, type_=type_)
+                    recorders[type_] = await stack.enter_async_context(logger(
+                        root,
+                        name=f"Replay_{type_}",
+                        console=self.console,
+                        **params,
+                    ))
+                count += len(await self.extractor.run(data, recorders[type_], type_=type_, tiktok=tiktok, ))
+        if count:
+            self.logger.info(_("已重新提取 {count} 条归档数据").format(count=count))
+        else:
+            self.logger.info(_("没有可以重新提取的归档数据"))
+
     async def run(self, run_command: list):
         self.run_command = run_command
         while self.running:
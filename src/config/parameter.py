@@ -37,11 +37,16 @@ from ..record import BaseLogger
 from ..record import LoggerManager
 from ..storage import RecordManager
 from ..tools import Cleaner
+from ..tools import RateLimiter
 from ..tools import cookie_dict_to_str
 from ..tools import create_client
 from ..translation import _
 
 if TYPE_CHECKING:
+    from ..manager import BlobStore
+    from ..manager import ResponseArchive
+    from ..manager import RedirectCache
+    from ..manager import DownloadQueue
     from ..manager import DownloadRecorder
     from ..tools import ColorfulConsole
     from .settings import Settings
@@ -103,6 +108,10 @@ class Parameter:
             owner_url_tiktok: dict,
             ffmpeg: str,
             recorder: "DownloadRecorder",
+            queue: "DownloadQueue",
+            blob: "BlobStore",
+            archive: "ResponseArchive",
+            redirect: "RedirectCache",
             browser_info: dict,
             browser_info_tiktok: dict,
             timeout=10,
@@ -153,6 +162,11 @@ class Parameter:
         self.max_retry = self.__check_max_retry(max_retry)
         self.max_pages = self.__check_max_pages(max_pages)
         self.recorder = recorder
+        self.queue = queue
+        self.blob = blob
+        self.archive = archive
+        self.redirect = redirect
+        self.limiter = RateLimiter()
         self.accounts_urls: list[SimpleNamespace] = Extractor.generate_data_object(
             accounts_urls)
         self.accounts_urls_tiktok: list[SimpleNamespace] = Extractor.generate_data_object(
@@ -442,6 +456,12 @@ class Parameter:
 
     def __check_storage_format(self, storage_format: str) -> str:
         if storage_format in RecordManager.DataLogger.keys():
+            if missing := getattr(RecordManager.DataLogger[storage_format], "missing", ""):
+                self.logger.warning(
+                    _("storage_format 参数 {storage_format} 需要安装 {missing} 库，程序默认不会储存任何数据至文件").format(
+                        storage_format=storage_format, missing=missing),
+                )
+                return ""
             self.logger.info(f"storage_format 参数已设置为 {storage_format}", False)
             return storage_format
         if not storage_format:
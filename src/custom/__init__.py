@@ -3,6 +3,7 @@ from .function import (
     failure_handling,
     condition_filter,
     suspend,
+    suspend_policy,
     verify_token,
 )
 from .internal import (
@@ -52,6 +53,26 @@ from .internal import (
 )
 from .static import (
     MAX_WORKERS,
+    MAX_WORKERS_HOST,
+    MAX_WORKERS_GLOBAL,
+    ACCOUNT_WORKERS,
+    DETAIL_WORKERS,
+    PIPELINE_SIZE,
+    SEGMENT_WORKERS,
+    SEGMENT_SIZE,
+    SEGMENT_RECORD_SIZE,
+    SEGMENT_RECORD_INTERVAL,
+    WRITE_BUFFER,
+    WRITE_LIMIT,
+    BLOB_STORE,
+    RESPONSE_ARCHIVE,
+    RATE_LIMIT,
+    REDIRECT_CACHE_TTL,
+    RESOLVE_WORKERS,
+    PROCESS_EXTRACT_THRESHOLD,
+    PROCESS_EXTRACT_WORKERS,
+    XLSX_SHARD_ROWS,
+    PARQUET_ROW_GROUP,
     DESCRIPTION_LENGTH,
     TEXT_REPLACEMENT,
     SERVER_HOST,
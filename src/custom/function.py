@@ -10,7 +10,8 @@ if TYPE_CHECKING:
 
 async def wait() -> None:
     """
-    设置网络请求间隔时间，仅对获取数据生效，不影响下载文件
+    设置获取数据失败后重试的间隔时间，不影响下载文件
+    请求频率限制请修改 static.py 中的 RATE_LIMIT
     """
     # 随机延时
     await sleep(randint(15, 45) * 0.1)
@@ -40,18 +41,25 @@ def condition_filter(data: dict) -> bool:
     return True
 
 
-async def suspend(count: int, console: "ColorfulConsole") -> None:
+def suspend_policy() -> tuple[int, int]:
     """
     如需采集大量数据，请启用该函数，可以在处理指定数量的数据后，暂停一段时间，然后继续运行
     batches: 每次处理的数据数量上限，比如：每次处理 10 个数据，就会暂停程序
     rest_time: 程序暂停的时间，单位：秒；比如：每处理 10 个数据，就暂停 5 分钟
     仅对 批量下载账号作品模式 和 批量下载合集作品模式 生效
     说明: 此处的一个数据代表一个账号或者一个合集，并非代表一个数据包
+    同时处理多个账号时，程序会等待正在处理的账号全部结束后再暂停
     """
     # 启用该函数
-    batches = 10  # 根据实际需求修改
-    if not count % batches:
-        rest_time = 60 * 5  # 根据实际需求修改
+    return 10, 60 * 5  # 根据实际需求修改
+    # 禁用该函数
+    # return 0, 0
+
+
+async def suspend(count: int, console: "ColorfulConsole") -> None:
+    """按照 suspend_policy 的设置，处理指定数量的数据后暂停运行"""
+    batches, rest_time = suspend_policy()
+    if batches and rest_time and not count % batches:
         console.print(
             _("程序连续处理了 {batches} 个数据，为了避免请求频率过高导致账号或 IP 被风控，"
               "程序已经暂停运行，将在 {rest_time} 秒后恢复运行！").format(
@@ -60,8 +68,6 @@ async def suspend(count: int, console: "ColorfulConsole") -> None:
             ),
         )
         await sleep(rest_time)
-    # 禁用该函数
-    # pass
 
 
 def verify_token(token: str) -> bool:
@@ -1,6 +1,73 @@
 # 同时下载作品文件的最大任务数，对直播无效
+# 作为每个下载主机的初始并发数，实际并发数会根据下载速度与服务器响应在上下限之间自动调整
 MAX_WORKERS = 4
 
+# 每个下载主机的最大并发连接数
+MAX_WORKERS_HOST = 16
+
+# 所有下载主机的最大并发连接数总和
+MAX_WORKERS_GLOBAL = 32
+
+# 批量下载账号作品时同时处理的最大账号数量，设置为 1 代表逐个处理账号
+# 所有账号共享请求频率限制与下载并发数
+ACCOUNT_WORKERS = 4
+
+# 批量下载链接作品时同时获取作品数据的最大请求数，实际请求频率受 RATE_LIMIT 限制
+DETAIL_WORKERS = 4
+
+# 批量下载账号作品时，获取、提取、下载各阶段之间最多缓存的数据页数
+PIPELINE_SIZE = 4
+
+# 分段下载单个文件的最大并发连接数，设置为 1 代表禁用分段下载
+SEGMENT_WORKERS = 4
+
+# 分段下载的分段大小，单位：字节；文件大小达到该值两倍时才会启用分段下载
+SEGMENT_SIZE = 1024 * 1024 * 16
+
+# 分段下载保存下载进度的条件：已写入数据量达到 SEGMENT_RECORD_SIZE 字节或距上次保存超过 SEGMENT_RECORD_INTERVAL 秒
+# 单个分段结束时总会保存下载进度
+SEGMENT_RECORD_SIZE = 1024 * 1024 * 4
+SEGMENT_RECORD_INTERVAL = 1
+
+# 是否按内容去重保存下载文件，启用后相同内容的文件仅保存一份，下载目录中的文件为硬链接
+# 修改任意一个硬链接文件会同时影响其他位置的同一文件，文件系统不支持硬链接时将复制文件
+BLOB_STORE = False
+
+# 获取数据请求的频率限制，不影响下载文件；按接口域名、接口路径与 Cookie/代理 分别计算
+# 值为 (每秒允许的请求数, 允许连续发送的最大请求数)，可以按接口域名或接口路径单独设置，未设置时使用 default
+RATE_LIMIT = {
+    "default": (0.5, 3),
+    # "www.tiktok.com": (0.3, 2),
+    # "/aweme/v1/web/comment/list/": (1, 5),
+}
+
+# 链接重定向结果缓存有效期，单位：秒；设置为 0 代表禁用缓存
+REDIRECT_CACHE_TTL = 60 * 60 * 24 * 7
+
+# 解析链接时同时发送的最大请求数，实际请求频率受 RATE_LIMIT 限制
+RESOLVE_WORKERS = 8
+
+# 是否归档接口原始响应数据，归档数据保存至项目根目录 Archive 文件夹，可在主菜单重新提取数据；安装 zstandard 库时使用 zstd 压缩，否则使用 gzip 压缩
+RESPONSE_ARCHIVE = False
+
+# 单批作品或评论数据达到该数量时使用多进程提取数据，设置为 0 代表禁用多进程提取
+PROCESS_EXTRACT_THRESHOLD = 0
+
+# 多进程提取数据的最大进程数
+PROCESS_EXTRACT_WORKERS = 4
+
+# storage_format 为 xlsx_stream 时，单个 XLSX 分片文件的最大数据行数
+XLSX_SHARD_ROWS = 100000
+
+# storage_format 为 parquet 时，单个行组的最大数据行数，数据缓存至该数量后压缩写入
+PARQUET_ROW_GROUP = 50000
+
+# 写入线程单次合并写入磁盘的最大数据量，单位：字节
+WRITE_BUFFER = 1024 * 1024 * 8
+
+# 等待写入磁盘的最大数据量，单位：字节；超出时暂停接收下载数据
+WRITE_LIMIT = 1024 * 1024 * 64
+
 # 作品描述最大长度限制，仅对作品文件名称生效，不影响数据储存，设置时需要考虑系统文件名称最大长度限制
 DESCRIPTION_LENGTH = 64
 
@@ -1,3 +1,5 @@
+from .controller import ConcurrencyController
 from .download import Downloader
+from .writer import FileWriter
 
-__all__ = ["Downloader"]
+__all__ = ["Downloader", "ConcurrencyController", "FileWriter", ]
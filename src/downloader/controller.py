@@ -0,0 +1,166 @@
+from asyncio import Condition
+from contextlib import asynccontextmanager
+from time import monotonic
+from urllib.parse import urlparse
+
+from ..custom import MAX_WORKERS
+from ..custom import MAX_WORKERS_GLOBAL
+from ..custom import MAX_WORKERS_HOST
+
+__all__ = ["ConcurrencyController"]
+
+
+class HostState:
+    """单个下载主机的并发状态"""
+
+    def __init__(self, limit: int, ):
+        self.limit = float(limit)
+        self.active = 0
+        self.bytes = 0
+        self.completed = 0
+        self.start = monotonic()
+        self.throughput = 0.0
+        self.increased = False
+        self.cooldown = 0.0
+        self.latency = 0.0
+        self.failure = 0.0
+
+    def update_failure(self, failed: bool, weight: float, ):
+        self.failure += (float(failed) - self.failure) * weight
+
+    def reset_window(self, now: float, ):
+        self.bytes = 0
+        self.completed = 0
+        self.start = now
+
+
+class ConcurrencyController:
+    """按下载主机自适应调整并发数，成功时加性增加，限流或异常时乘性减少"""
+    # 触发限流后暂停增加并发数的时长，单位：秒
+    COOLDOWN = 30
+    # 增加并发数后下载速度低于上一统计窗口的该比例时回退
+    REGRESSION = 0.9
+    # 延迟与失败率的指数加权平均系数
+    WEIGHT = 0.3
+    # 选择镜像地址时失败率的惩罚系数
+    PENALTY = 4
+
+    def __init__(
+            self,
+            initial: int = MAX_WORKERS,
+            host_limit: int = MAX_WORKERS_HOST,
+            global_limit: int = MAX_WORKERS_GLOBAL,
+    ):
+        self.initial = max(min(initial, host_limit), 1)
+        self.host_limit = max(host_limit, 1)
+        self.global_limit = max(global_limit, 1)
+        self.hosts: dict[str, HostState] = {}
+        self.active = 0
+        self.condition = Condition()
+
+    @staticmethod
+    def extract_host(url: str) -> str:
+        return urlparse(url).netloc
+
+    def state(self, host: str) -> HostState:
+        if not (state := self.hosts.get(host)):
+            state = self.hosts[host] = HostState(self.initial)
+        return state
+
+    def record_latency(self, url: str, seconds: float, ):
+        """记录请求首字节延迟"""
+        state = self.state(self.extract_host(url))
+        state.latency = seconds if not state.latency else state.latency + (seconds - state.latency) * self.WEIGHT
+
+    def score(self, url: str, ) -> float:
+        """下载主机评分，综合延迟与失败率，数值越小越优先；未使用过的主机评分为 0"""
+        if not (state := self.hosts.get(self.extract_host(url))):
+            return 0.0
+        return state.latency * (1 + self.PENALTY * state.failure) + state.failure
+
+    def rank(self, urls: list[str], ) -> list[str]:
+        """按下载主机评分排序候选地址，评分相同时保持原有顺序"""
+        return sorted(urls, key=self.score)
+
+    def limit(self, url: str) -> int:
+        return int(self.state(self.extract_host(url)).limit)
+
+    def __available(self, state: HostState) -> bool:
+        return state.active < int(state.limit) and self.active < self.global_limit
+
+    def __occupy(self, state: HostState, count: int = 1, ):
+        state.active += count
+        self.active += count
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        """占用一个下载主机的并发名额，退出时释放"""
+        host = self.extract_host(url)
+        await self.acquire(host)
+        try:
+            yield host
+        finally:
+            await self.release(host)
+
+    async def acquire(self, host: str):
+        state = self.state(host)
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.__available(state))
+            self.__occupy(state)
+
+    def reserve(self, url: str, count: int, ) -> int:
+        """尝试额外占用并发名额，不等待，返回实际占用的名额数量"""
+        state = self.state(self.extract_host(url))
+        granted = 0
+        while granted < count and self.__available(state):
+            self.__occupy(state)
+            granted += 1
+        return granted
+
+    async def release(self, host: str, count: int = 1, ):
+        if count <= 0:
+            return
+        self.__occupy(self.state(host), -count)
+        async with self.condition:
+            self.condition.notify_all()
+
+    def success(self, url: str, size: int, ):
+        """记录下载成功，每完成一个统计窗口根据下载速度调整并发数"""
+        state = self.state(self.extract_host(url))
+        state.update_failure(False, self.WEIGHT, )
+        state.bytes += max(size, 0)
+        state.completed += 1
+        if state.completed < int(state.limit):
+            return
+        now = monotonic()
+        throughput = state.bytes / max(now - state.start, 0.001)
+        if state.increased and throughput < state.throughput * self.REGRESSION:
+            state.limit = max(state.limit - 1, 1)
+            state.increased = False
+        elif now >= state.cooldown and state.limit < self.host_limit:
+            state.limit = min(state.limit + 1, self.host_limit)
+            state.increased = True
+        else:
+            state.increased = False
+        state.throughput = throughput
+        state.reset_window(now)
+
+    def throttle(self, url: str, ) -> int:
+        """记录服务器限流（429，或无法重新获取下载链接时的 403），并发数减半并暂停增加"""
+        state = self.state(self.extract_host(url))
+        state.update_failure(True, self.WEIGHT, )
+        now = monotonic()
+        state.limit = max(state.limit / 2, 1)
+        state.cooldown = now + self.COOLDOWN
+        state.increased = False
+        state.reset_window(now)
+        return int(state.limit)
+
+    def error(self, url: str, ) -> int:
+        """记录网络异常，小幅减少并发数"""
+        state = self.state(self.extract_host(url))
+        state.update_failure(True, self.WEIGHT, )
+        state.limit = max(state.limit * 0.75, 1)
+        state.increased = False
+        state.reset_window(monotonic())
+        return int(state.limit)
@@ -1,14 +1,22 @@
+from asyncio import Lock
 from asyncio import Semaphore
 from asyncio import gather
+from contextlib import nullcontext
 from datetime import datetime
+from functools import partial
+from json import JSONDecodeError
+from json import dumps
+from json import load
 from pathlib import Path
+from re import sub
 from shutil import move
+from time import monotonic
 from time import time
 from types import SimpleNamespace
 from typing import TYPE_CHECKING
 from typing import Union
+from urllib.parse import urlparse
 
-from aiofiles import open
 from httpx import HTTPStatusError
 from httpx import RequestError
 from httpx import StreamError
@@ -25,10 +33,19 @@ from rich.progress import (
 
 from ..custom import DESCRIPTION_LENGTH
 from ..custom import MAX_FILENAME_LENGTH
-from ..custom import MAX_WORKERS
 from ..custom import (
     PROGRESS,
 )
+from ..custom import SEGMENT_RECORD_INTERVAL
+from ..custom import SEGMENT_RECORD_SIZE
+from ..custom import SEGMENT_SIZE
+from ..custom import SEGMENT_WORKERS
+from ..extract import Extractor
+from ..interface import Detail
+from ..interface import DetailTikTok
+from ..storage import BaseTextLogger
+from .controller import ConcurrencyController
+from .writer import FileWriter
 from ..tools import CacheError
 from ..tools import PrivateRetry
 from ..tools import TikTokDownloaderError
@@ -44,7 +61,14 @@ __all__ = ["Downloader"]
 
 
 class Downloader:
-    semaphore = Semaphore(MAX_WORKERS)
+    controller = ConcurrencyController()
+    writer = FileWriter()
+    # 下载服务器触发限流时返回的响应码；403 同时可能表示下载链接过期，仅在无法重新获取下载链接时视为限流
+    THROTTLE_STATUS = {429}
+    # 下载链接过期时服务器返回的响应码
+    EXPIRED_STATUS = {403, 410}
+    # 单个作品重新获取下载链接的最大次数
+    REFRESH_LIMIT = 2
     CONTENT_TYPE_MAP = {
         "image/png": "png",
         "image/jpeg": "jpeg",
@@ -56,6 +80,8 @@ class Downloader:
     }
 
     def __init__(self, params: "Parameter"):
+        self.parameter = params
+        self.extractor = Extractor(params)
         self.cleaner = params.CLEANER
         self.client: "AsyncClient" = params.client
         self.client_tiktok: "AsyncClient" = params.client_tiktok
@@ -81,10 +107,16 @@ class Downloader:
         self.chunk = params.chunk
         self.max_retry = params.max_retry
         self.recorder = params.recorder
+        self.queue = params.queue
+        self.blob = params.blob
+        self.blob_keys: dict[Path, str] = {}
         self.timeout = params.timeout
         self.ffmpeg = params.ffmpeg
         self.cache = params.cache
         self.truncate = params.truncate
+        self.refreshed: dict[str, dict] = {}
+        self.refresh_count: dict[str, int] = {}
+        self.refresh_lock: dict[str, Lock] = {}
 
     def __general_progress_object(self):
         """文件下载进度条"""
@@ -107,6 +139,9 @@ class Downloader:
             expand=True,
         )
 
+    def progress_object(self):
+        return self.__general_progress_object()
+
     def __live_progress_object(self):
         """直播下载进度条"""
         return Progress(
@@ -158,6 +193,8 @@ class Downloader:
             mix_title: str = "",
             collect_id: str = "",
             collect_name: str = "",
+            progress: Progress = None,
+            count: SimpleNamespace = None,
     ):
         root = self.storage_folder(
             mode,
@@ -172,11 +209,18 @@ class Downloader:
                 collect_name,
             ),
         )
-        return await self.batch_processing(data, root, tiktok=tiktok, )
+        return await self.batch_processing(data, root, progress, count, tiktok=tiktok, )
 
-    async def run_general(self, data: list[dict], tiktok: bool, **kwargs):
+    async def run_general(
+            self,
+            data: list[dict],
+            tiktok: bool,
+            progress: Progress = None,
+            count: SimpleNamespace = None,
+            **kwargs,
+    ):
         root = self.storage_folder(mode="detail")
-        return await self.batch_processing(data, root, tiktok=tiktok, )
+        return await self.batch_processing(data, root, progress, count, tiktok=tiktok, )
 
     async def run_music(self, data: list[dict], **kwargs, ):
         root = self.root.joinpath("Music")
@@ -236,18 +280,27 @@ class Downloader:
             self.headers["User-Agent"],
         )
 
-    async def batch_processing(
-            self,
-            data: list[dict],
-            root: Path,
-            **kwargs):
-        count = SimpleNamespace(
+    @staticmethod
+    def generate_count() -> SimpleNamespace:
+        return SimpleNamespace(
             downloaded_image=set(),
             skipped_image=set(),
             downloaded_video=set(),
             skipped_video=set()
         )
+
+    async def batch_processing(
+            self,
+            data: list[dict],
+            root: Path,
+            progress: Progress = None,
+            count: SimpleNamespace = None,
+            **kwargs):
+        """传入 count 时由调用方负责汇总下载数量"""
+        statistics = count is None
+        count = count or self.generate_count()
         tasks = []
+        downloaded = await self.recorder.has_ids([i["id"] for i in data])
         for item in data:
             item["desc"] = beautify_string(item["desc"], DESCRIPTION_LENGTH)
             name = self.generate_detail_name(item)
@@ -259,7 +312,8 @@ class Downloader:
                 "item": item,
                 "count": count,
                 "temp_root": temp_root,
-                "actual_root": actual_root
+                "actual_root": actual_root,
+                "downloaded": downloaded,
             }
             if (t := item["type"]) == _("图集"):
                 await self.download_image(**params, type_=_("图集"), )
@@ -278,9 +332,10 @@ class Downloader:
         await self.downloader_chart(
             tasks,
             count,
-            self.__general_progress_object(),
+            progress or self.__general_progress_object(),
             **kwargs)
-        self.statistics_count(count)
+        if statistics:
+            self.statistics_count(count)
         return name, actual_root
     
     async def downloader_chart(
@@ -290,17 +345,61 @@ class Downloader:
             progress: Progress,
             semaphore: Semaphore = None,
             **kwargs):
-        with progress:
-            tasks = [
-                self.request_file(
-                    *task,
-                    count=count,
-                    **kwargs,
-                    progress=progress,
-                    semaphore=semaphore,
-                ) for task in tasks
-            ]
-            await gather(*tasks)
+        # 进度条已由调用方启动时不再重复启动
+        await self.queue.add(tasks, kwargs.get("tiktok", False), )
+        try:
+            with nullcontext() if progress.live.is_started else progress:
+                await gather(*[
+                    self.__request_task(
+                        task,
+                        count,
+                        progress,
+                        semaphore,
+                        **kwargs,
+                    ) for task in tasks
+                ])
+        finally:
+            self.__clear_refreshed({task[4] for task in tasks})
+
+    async def __request_task(
+            self,
+            task: tuple,
+            count: SimpleNamespace,
+            progress: Progress,
+            semaphore: Semaphore = None,
+            **kwargs,
+    ) -> bool:
+        """下载文件并同步更新持久化任务队列的任务状态，下载失败的任务保留至下次恢复"""
+        await self.queue.start(task[1])
+        if result := await self.request_file(
+                *task,
+                count=count,
+                **kwargs,
+                progress=progress,
+                semaphore=semaphore,
+        ):
+            await self.queue.finish(task[1])
+        else:
+            await self.queue.reset(task[1])
+        return result
+
+    async def run_resume(self, ):
+        """恢复上次运行未完成的下载任务"""
+        if not (tasks := await self.queue.pending()):
+            self.log.info(_("没有未完成的下载任务"))
+            return
+        self.log.info(_("共有 {count} 个未完成的下载任务").format(count=len(tasks)))
+        count = self.generate_count()
+        with (progress := self.__general_progress_object()):
+            for tiktok in (False, True):
+                if data := [i for i, j in tasks if j is tiktok]:
+                    await self.downloader_chart(
+                        data,
+                        count,
+                        progress,
+                        tiktok=tiktok,
+                    )
+        self.statistics_count(count)
 
     def deal_folder_path(
             self,
@@ -315,15 +414,18 @@ class Downloader:
         actual = root.joinpath(name)
         return cache, actual
 
-    async def is_downloaded(self, id_: str) -> bool:
+    async def is_downloaded(self, id_: str, downloaded: set = None, ) -> bool:
+        """传入 downloaded 时使用批量查询的下载记录，不再逐个查询数据库"""
+        if downloaded is not None:
+            return id_ in downloaded
         return await self.recorder.has_id(id_)
 
     @staticmethod
     def is_exists(path: Path) -> bool:
         return path.exists()
 
-    async def is_skip(self, id_: str, path: Path) -> bool:
-        return await self.is_downloaded(id_) or self.is_exists(path)
+    async def is_skip(self, id_: str, path: Path, downloaded: set = None, ) -> bool:
+        return await self.is_downloaded(id_, downloaded, ) or self.is_exists(path)
 
     async def download_image(
             self,
@@ -336,6 +438,7 @@ class Downloader:
             actual_root: Path,
             suffix: str = "jpeg",
             type_: str = _("图集"),
+            downloaded: set = None,
     ) -> None:
         if not item["downloads"]:
             self.log.error(_("【{type}】{name} 提取文件下载地址失败，跳过下载").format(type=type_, name=name))
@@ -344,7 +447,7 @@ class Downloader:
                 item["downloads"],
                 start=1,
         ):
-            if await self.is_downloaded(id_):
+            if await self.is_downloaded(id_, downloaded, ):
                 count.skipped_image.add(id_)
                 self.log.info(_("【{type}】{name} 存在下载记录，跳过下载").format(type=type_, name=name))
                 break
@@ -354,14 +457,18 @@ class Downloader:
                 self.log.info(f"文件路径: {p.resolve()}", False)
                 count.skipped_image.add(id_)
                 continue
+            if type_ == _("图集"):
+                # 实况的下载地址路径包含签名，仅图片使用下载地址路径作为资源标识
+                self.__set_asset_key(p, self.__url_path(img), )
             tasks.append((
-                img,
+                self.__task_url(item, img, f"downloads:{index - 1}", ),
                 temp_root.with_name(
                     f"{name}_{index}.{suffix}"),
                 p,
                 f"【{type_}】{name}_{index}",
                 id_,
                 suffix,
+                f"downloads:{index - 1}",
             ))
 
     async def download_video(
@@ -375,6 +482,7 @@ class Downloader:
             actual_root: Path,
             suffix: str = "mp4",
             type_: str = _("视频"),
+            downloaded: set = None,
     ) -> None:
         if not item["downloads"]:
             self.log.error(_("【{type}】{name} 提取文件下载地址失败，跳过下载").format(type=type_, name=name))
@@ -384,20 +492,31 @@ class Downloader:
                 p := actual_root.with_name(
                     f"{name}.{suffix}",
                 ),
+                downloaded,
         ):
             self.log.info(_("【{type}】{name} 存在下载记录或文件已存在，跳过下载").format(type=type_, name=name))
             self.log.info(f"文件路径: {p.resolve()}", False)
             count.skipped_video.add(id_)
             return
+        if uri := item.get("uri"):
+            self.__set_asset_key(p, f"uri:{uri}", )
         tasks.append((
-            item["downloads"],
+            self.__task_url(item, item["downloads"], "downloads", ),
             temp_root.with_name(f"{name}.{suffix}"),
             p,
             f"【{type_}】{name}",
             id_,
             suffix,
+            "downloads",
         ))
 
+    @staticmethod
+    def __task_url(item: dict, url: str, key: str, ) -> str | list[str]:
+        """存在多个候选下载地址时使用候选地址列表"""
+        if len(urls := item.get("mirrors", {}).get(key) or []) > 1:
+            return urls
+        return url
+
     def download_music(
             self,
             tasks: list,
@@ -422,6 +541,7 @@ class Downloader:
                 f"【音乐】{name}",
                 id_,
                 suffix,
+                "" if switch else key,
             ))
 
     def download_cover(
@@ -447,6 +567,7 @@ class Downloader:
                 f"【封面】{name}",
                 id_,
                 original_suffix,
+                "origin_cover",
             ))
         if all((self.dynamic,
                 url := item["dynamic_cover"],
@@ -459,6 +580,7 @@ class Downloader:
                 f"【动图】{name}",
                 id_,
                 dynamic_suffix,
+                "dynamic_cover",
             ))
 
     def check_deal_music(
@@ -472,6 +594,98 @@ class Downloader:
 
     @PrivateRetry.retry
     async def request_file(
+            self,
+            url: str | list[str],
+            temp: Path,
+            actual: Path,
+            show: str,
+            id_: str,
+            suffix: str,
+            key: str,
+            count: SimpleNamespace,
+            progress: Progress,
+            headers: dict = None,
+            tiktok=False,
+            unknown_size=False,
+            semaphore: Semaphore = None,
+    ) -> bool:
+        """url 为单个下载地址或按优先级排列的候选下载地址列表，失败时依次切换至其他候选地址；
+        key 为下载地址在作品数据中的键名，用于下载链接过期时重新获取"""
+        if await self.__link_blob(url, actual, show, id_, key, count, ):
+            return True
+        while True:
+            item = self.refreshed.get(id_)
+            for index, candidate in enumerate(self.__candidate_urls(url, id_, key, )):
+                if index:
+                    self.log.info(_("{show} 切换下载地址：{host}").format(
+                        show=show,
+                        host=self.controller.extract_host(candidate),
+                    ))
+                if await self.__request_file(
+                        candidate,
+                        temp,
+                        actual,
+                        show,
+                        id_,
+                        suffix,
+                        key,
+                        count,
+                        progress,
+                        headers,
+                        tiktok,
+                        unknown_size,
+                        semaphore,
+                ):
+                    return True
+                if self.refreshed.get(id_) is not item:
+                    break
+            else:
+                return False
+            # 下载链接已重新获取，立即使用新的下载地址重试，重新获取次数受 REFRESH_LIMIT 限制
+            self.log.info(_("{show} 使用重新获取的下载地址重试").format(show=show))
+
+    async def __link_blob(
+            self,
+            url: str | list[str],
+            actual: Path,
+            show: str,
+            id_: str,
+            key: str,
+            count: SimpleNamespace,
+    ) -> bool:
+        """存在相同资源的已下载文件时直接创建文件链接，否则记录资源标识，下载完成后加入去重存储"""
+        if not self.blob.switch:
+            return False
+        asset = self.blob_keys.get(actual.with_suffix("")) or self.__asset_key(url, id_, key, )
+        if not (path := await self.blob.link(asset, actual, )):
+            self.blob_keys[actual.with_suffix("")] = asset
+            return False
+        self.blob_keys.pop(actual.with_suffix(""), None)
+        self.log.info(_("{show} 存在相同内容的文件，已创建文件链接").format(show=show))
+        self.log.info(f"文件路径 {path.resolve()}", False)
+        await self.recorder.update_id(id_)
+        self.add_count(show, id_, count)
+        return True
+
+    def __set_asset_key(self, actual: Path, asset: str, ) -> None:
+        """创建下载任务时记录基于作品数据的资源标识，恢复的下载任务没有该记录"""
+        if asset and self.blob.switch:
+            self.blob_keys[actual.with_suffix("")] = asset
+
+    @classmethod
+    def __asset_key(cls, url: str | list[str], id_: str, key: str, ) -> str:
+        """封面与音乐等静态文件使用下载地址路径作为资源标识，可在不同作品与下载主机之间去重；
+        下载地址路径包含签名的文件使用作品 ID 与键名作为资源标识"""
+        if key in {"", "music_url", "origin_cover", "dynamic_cover", }:
+            return cls.__url_path(url[0] if isinstance(url, list) else url)
+        return f"{id_}:{key}"
+
+    @staticmethod
+    def __url_path(url: str, ) -> str:
+        """去除查询参数并合并重复斜杠，相同资源的不同下载主机与签名参数得到相同的路径"""
+        return sub(r"/+", "/", urlparse(url).path) if url else ""
+
+    async def __request_file(
             self,
             url: str,
             temp: Path,
@@ -479,6 +693,7 @@ class Downloader:
             show: str,
             id_: str,
             suffix: str,
+            key: str,
             count: SimpleNamespace,
             progress: Progress,
             headers: dict = None,
@@ -486,19 +701,34 @@ class Downloader:
             unknown_size=False,
             semaphore: Semaphore = None,
     ) -> bool:
-        async with semaphore or self.semaphore:
+        async with semaphore or self.controller.slot(url):
             client = self.client_tiktok if tiktok else self.client
             headers = self.__adapter_headers(headers, tiktok, )
             self.log.info(f"{show} URL: {url}", False, )
             self.log.info(f"{show} Headers: {headers}", False, )
             try:
                 # length, suffix = await self.__head_file(client, url, headers, suffix, )
+                if record := self.__read_segments_record(temp):
+                    return await self.download_segments(
+                        client,
+                        url,
+                        headers,
+                        temp,
+                        actual.with_suffix(f".{record['suffix']}", ),
+                        show,
+                        id_,
+                        record,
+                        count,
+                        progress,
+                    )
                 position = self.__update_headers_range(headers, temp, )
+                start = monotonic()
                 async with client.stream(
                         "GET",
                         url,
                         headers=headers,
                 ) as response:
+                    self.controller.record_latency(url, monotonic() - start, )
                     if response.status_code == 416:
                         raise CacheError(_("文件缓存异常，尝试重新下载"))
                     response.raise_for_status()
@@ -510,33 +740,64 @@ class Downloader:
                         unknown_size,
                         show,
                     ):
+                        case 1 if not self.__check_segments(response, length, position, ):
+                            if result := await self.download_file(
+                                    temp,
+                                    actual.with_suffix(f".{suffix}", ),
+                                    show,
+                                    id_,
+                                    response,
+                                    length,
+                                    position,
+                                    count,
+                                    progress,
+                            ):
+                                self.controller.success(url, length - position, )
+                            else:
+                                self.controller.error(url)
+                            return result
                         case 1:
-                            return await self.download_file(
-                                temp,
-                                actual.with_suffix(f".{suffix}", ),
-                                show,
-                                id_,
-                                response,
-                                length,
-                                position,
-                                count,
-                                progress,
-                            )
+                            record = self.__generate_segments_record(temp, length, suffix, )
                         case 0:
                             return True
                         case -1:
                             return False
+                # 分段下载不复用探测请求的响应内容，退出上下文后关闭该连接
+                return await self.download_segments(
+                    client,
+                    url,
+                    headers,
+                    temp,
+                    actual.with_suffix(f".{suffix}", ),
+                    show,
+                    id_,
+                    record,
+                    count,
+                    progress,
+                )
             except RequestError as e:
                 self.log.warning(_("网络异常: {error_repr}").format(error_repr=repr(e)))
+                self.controller.error(url)
                 return False
             except HTTPStatusError as e:
                 self.log.warning(_("响应码异常: {error_repr}").format(error_repr=repr(e)))
+                status = e.response.status_code
+                if status in self.EXPIRED_STATUS and await self.__refresh_url(
+                        url,
+                        show,
+                        id_,
+                        key,
+                        tiktok,
+                ):
+                    return False
+                self.__feedback_status(url, status, status == 403, )
                 self.console.warning(
                     _("如果 TikTok 平台作品下载功能异常，请检查配置文件中 browser_info_tiktok 的 device_id 参数！"),
                 )
                 return False
             except CacheError as e:
                 self.delete(temp)
+                self.__delete_segments_record(temp)
                 self.log.error(str(e))
                 return False
             except Exception as e:
@@ -565,11 +826,14 @@ class Downloader:
             completed=position,
         )
         try:
-            async with open(cache, "ab") as f:
+            # 写入线程实际写入数据后才更新进度条，退出时等待数据全部写入
+            async with self.writer.open(
+                    cache,
+                    callback=lambda size: progress.update(task_id, advance=size),
+            ) as f:
                 async for chunk in response.aiter_bytes(self.chunk):
                     await f.write(chunk)
-                    progress.update(task_id, advance=len(chunk))
-                progress.remove_task(task_id)
+            progress.remove_task(task_id)
         except (
                 RequestError,
                 StreamError,
@@ -579,7 +843,190 @@ class Downloader:
             # self.delete_file(cache)
             await self.recorder.delete_id(id_)
             return False
+        return await self.__download_completed(cache, actual, show, id_, count, )
+
+    async def download_segments(
+            self,
+            client: "AsyncClient",
+            url: str,
+            headers: dict,
+            cache: Path,
+            actual: Path,
+            show: str,
+            id_: str,
+            record: dict,
+            count: SimpleNamespace,
+            progress: Progress,
+    ) -> bool:
+        """多连接分段下载，每个分段写入缓存文件的对应位置，分段进度记录于缓存文件同名 JSON 文件"""
+        self.log.info(_("{show} 启用分段下载，分段数量：{count}").format(show=show, count=len(record["segments"])), False)
+        self.__allocate_file(cache, record["length"], )
+        pending = [i for i in record["segments"] if i[0] + i[2] <= i[1]]
+        task_id = progress.add_task(
+            beautify_string(show, self.truncate),
+            total=record["length"],
+            completed=sum(i[2] for i in record["segments"]),
+        )
+        # 距上次保存下载进度后写入的数据量与保存时间
+        checkpoint = SimpleNamespace(size=0, time=monotonic(), )
+        # 当前任务已占用一个并发名额，其余分段连接仅使用空闲名额，避免相互等待
+        extra = self.controller.reserve(url, min(SEGMENT_WORKERS, len(pending)) - 1, )
+        try:
+            result = await gather(
+                *[
+                    self.__download_segments_worker(
+                        client,
+                        url,
+                        headers,
+                        cache,
+                        show,
+                        record,
+                        pending,
+                        progress,
+                        task_id,
+                        checkpoint,
+                    ) for _i in range(extra + 1)
+                ],
+                return_exceptions=True,
+            )
+        finally:
+            await self.controller.release(self.controller.extract_host(url), extra, )
+            progress.remove_task(task_id)
+        for i in result:
+            if isinstance(i, BaseException):
+                raise i
+        if not all(result):
+            await self.recorder.delete_id(id_)
+            return False
+        self.__delete_segments_record(cache)
+        return await self.__download_completed(cache, actual, show, id_, count, )
+
+    async def __download_segments_worker(
+            self,
+            client: "AsyncClient",
+            url: str,
+            headers: dict,
+            cache: Path,
+            show: str,
+            record: dict,
+            pending: list[list[int]],
+            progress: Progress,
+            task_id,
+            checkpoint: SimpleNamespace,
+    ) -> bool:
+        success = True
+        while pending:
+            success = await self.__download_segment(
+                client,
+                url,
+                headers,
+                cache,
+                show,
+                record,
+                pending.pop(0),
+                progress,
+                task_id,
+                checkpoint,
+            ) and success
+        return success
+
+    async def __download_segment(
+            self,
+            client: "AsyncClient",
+            url: str,
+            headers: dict,
+            cache: Path,
+            show: str,
+            record: dict,
+            segment: list[int],
+            progress: Progress,
+            task_id,
+            checkpoint: SimpleNamespace,
+    ) -> bool:
+        start, end = segment[:2]
+        try:
+            async with client.stream(
+                    "GET",
+                    url,
+                    headers=headers | {"Range": f"bytes={start + segment[2]}-{end}"},
+            ) as response:
+                response.raise_for_status()
+                if response.status_code != 206:
+                    raise CacheError(_("{show} 服务器不支持分段下载，尝试重新下载").format(show=show))
+                position = segment[2]
+                async with self.writer.open(
+                        cache,
+                        start + segment[2],
+                        lambda size: self.__segment_written(
+                            cache,
+                            record,
+                            segment,
+                            size,
+                            progress,
+                            task_id,
+                            checkpoint,
+                        ),
+                ) as f:
+                    async for chunk in response.aiter_bytes(self.chunk):
+                        await f.write(chunk)
+                self.controller.success(url, segment[2] - position, )
+        except (
+                RequestError,
+                StreamError,
+                HTTPStatusError,
+        ) as e:
+            if isinstance(e, HTTPStatusError):
+                if e.response.status_code in self.EXPIRED_STATUS:
+                    # 由 __request_file 判断下载链接是否过期
+                    raise
+                self.__feedback_status(url, e.response.status_code, )
+            else:
+                self.controller.error(url)
+            self.log.warning(
+                _("{show} 分段 {start}-{end} 下载中断，错误信息：{error}").format(
+                    show=show,
+                    start=start,
+                    end=end,
+                    error=e,
+                ))
+            return False
+        finally:
+            # 写入对象关闭后已回调全部写入进度
+            self.__checkpoint_segments(cache, record, checkpoint, )
+        return True
+
+    def __segment_written(
+            self,
+            cache: Path,
+            record: dict,
+            segment: list[int],
+            size: int,
+            progress: Progress,
+            task_id,
+            checkpoint: SimpleNamespace,
+    ):
+        """数据写入磁盘后再更新分段进度，分段记录仅包含已写入的数据，定期保存"""
+        segment[2] += size
+        progress.update(task_id, advance=size)
+        checkpoint.size += size
+        if checkpoint.size >= SEGMENT_RECORD_SIZE or monotonic() - checkpoint.time >= SEGMENT_RECORD_INTERVAL:
+            self.__checkpoint_segments(cache, record, checkpoint, )
+
+    def __checkpoint_segments(self, cache: Path, record: dict, checkpoint: SimpleNamespace, ):
+        checkpoint.size, checkpoint.time = 0, monotonic()
+        self.__save_segments_record(cache, record, )
+
+    async def __download_completed(
+            self,
+            cache: Path,
+            actual: Path,
+            show: str,
+            id_: str,
+            count: SimpleNamespace,
+    ) -> bool:
         self.save_file(cache, actual)
+        if asset := self.blob_keys.pop(actual.with_suffix(""), None):
+            await self.blob.store(asset, actual, )
         self.log.info(_("{show} 文件下载成功").format(show=show))
         self.log.info(f"文件路径 {actual.resolve()}", False)
         await self.recorder.update_id(id_)
@@ -760,6 +1207,137 @@ class Downloader:
         headers["Range"] = f"bytes={position}-"
         return position
 
+    def __candidate_urls(self, url: str | list[str], id_: str, key: str, ) -> list[str]:
+        """获取候选下载地址，优先使用重新获取的下载地址，按下载主机评分排序"""
+        if key and (item := self.refreshed.get(id_)):
+            urls = item.get("mirrors", {}).get(key) or [self.__select_url(item, key)]
+        else:
+            urls = url if isinstance(url, list) else [url]
+        urls = [i for i in urls if i]
+        return self.controller.rank(urls) if len(urls) > 1 else urls
+
+    @staticmethod
+    def __select_url(item: dict, key: str, ) -> str:
+        key, _i, index = key.partition(":")
+        value = item.get(key)
+        if index and isinstance(value, list):
+            value = value[int(index)] if int(index) < len(value) else ""
+        return value if isinstance(value, str) else ""
+
+    async def __refresh_url(
+            self,
+            url: str,
+            show: str,
+            id_: str,
+            key: str,
+            tiktok: bool,
+    ) -> bool:
+        """重新获取作品数据并提取新的下载链接，返回是否获取到可用于重试的下载链接"""
+        if not key:
+            return False
+        async with self.refresh_lock.setdefault(id_, Lock()):
+            if (item := self.refreshed.get(id_)) and self.__select_url(item, key) not in {"", url}:
+                return True
+            if (times := self.refresh_count.get(id_, 0)) >= self.REFRESH_LIMIT:
+                return False
+            self.refresh_count[id_] = times + 1
+            self.log.info(_("{show} 下载链接已失效，正在重新获取作品数据").format(show=show))
+            if not (item := await self.__request_detail(id_, tiktok, )) or not self.__select_url(item, key):
+                self.log.warning(_("{show} 重新获取下载链接失败").format(show=show))
+                return False
+            self.refreshed[id_] = item
+            return True
+
+    def __clear_refreshed(self, ids: set[str], ):
+        """作品文件全部下载结束后清除重新获取的下载链接记录"""
+        for id_ in ids:
+            self.refreshed.pop(id_, None)
+            self.refresh_count.pop(id_, None)
+            self.refresh_lock.pop(id_, None)
+
+    async def __request_detail(self, id_: str, tiktok: bool, ) -> dict | None:
+        if not (data := await (DetailTikTok if tiktok else Detail)(
+                self.parameter,
+                detail_id=id_,
+        ).run()):
+            return None
+        data = await self.extractor.run([data], BaseTextLogger(), tiktok=tiktok, )
+        return data[0] if data else None
+
+    def __feedback_status(self, url: str, status: int, throttle=False, ):
+        """throttle 为 True 时将响应码视为限流"""
+        if throttle or status in self.THROTTLE_STATUS:
+            limit = self.controller.throttle(url)
+            self.log.info(
+                _("下载服务器 {host} 响应码 {status}，并发数调整为 {limit}").format(
+                    host=self.controller.extract_host(url),
+                    status=status,
+                    limit=limit,
+                ),
+                False,
+            )
+        else:
+            self.controller.error(url)
+
+    @staticmethod
+    def __check_segments(response, length: int, position: int, ) -> bool:
+        """仅对从头开始下载、服务器支持范围请求且文件足够大的文件启用分段下载"""
+        return all((
+            SEGMENT_WORKERS > 1,
+            not position,
+            response.status_code == 206,
+            length >= SEGMENT_SIZE * 2,
+        ))
+
+    @staticmethod
+    def __segments_record_path(cache: Path) -> Path:
+        return cache.with_name(f"{cache.name}.json")
+
+    def __generate_segments_record(self, cache: Path, length: int, suffix: str, ) -> dict:
+        record = {
+            "length": length,
+            "suffix": suffix,
+            "segments": [
+                [i, min(i + SEGMENT_SIZE, length) - 1, 0]
+                for i in range(0, length, SEGMENT_SIZE)
+            ],
+        }
+        self.__save_segments_record(cache, record, )
+        return record
+
+    def __read_segments_record(self, cache: Path) -> dict | None:
+        if not (path := self.__segments_record_path(cache)).is_file():
+            return None
+        try:
+            with path.open("r", encoding="UTF-8") as f:
+                record = load(f)
+            if cache.is_file() and cache.stat().st_size == record["length"]:
+                return record
+        except (JSONDecodeError, KeyError, TypeError):
+            pass
+        self.delete(path)
+        self.delete(cache)
+        return None
+
+    def __save_segments_record(self, cache: Path, record: dict, ) -> None:
+        """在事件循环中生成分段记录快照，由写入线程保存，保存顺序与提交顺序一致"""
+        self.writer.call(partial(
+            self.__segments_record_path(cache).write_text,
+            dumps(record),
+            encoding="UTF-8",
+        ))
+
+    def __delete_segments_record(self, cache: Path) -> None:
+        """由写入线程删除分段记录，确保在已提交的分段记录保存之后执行"""
+        self.writer.call(partial(self.delete, self.__segments_record_path(cache)))
+
+    @staticmethod
+    def __allocate_file(cache: Path, length: int, ) -> None:
+        if cache.is_file() and cache.stat().st_size == length:
+            return
+        with cache.open("wb") as f:
+            f.truncate(length)
+
     def __extract_type(self, content: str) -> str:
         if not (s := self.CONTENT_TYPE_MAP.get(content)):
             return self.__unknown_type(content)
@@ -0,0 +1,217 @@
+from asyncio import AbstractEventLoop
+from asyncio import Event
+from asyncio import Future
+from asyncio import get_running_loop
+from os import O_CREAT
+from os import O_WRONLY
+from os import SEEK_END
+from os import SEEK_SET
+from os import close
+from os import lseek
+from os import open as os_open
+from os import write
+from pathlib import Path
+from queue import SimpleQueue
+from threading import Thread
+from typing import Callable
+
+try:
+    from os import pwrite
+except ImportError:  # Windows 不支持 pwrite
+    pwrite = None
+try:
+    from os import O_BINARY
+except ImportError:  # 仅 Windows 区分文本与二进制模式
+    O_BINARY = 0
+
+from ..custom import WRITE_BUFFER
+from ..custom import WRITE_LIMIT
+
+__all__ = ["FileWriter", "WriteHandle"]
+
+
+class WriteHandle:
+    """写入线程中打开的文件，数据按偏移量顺序写入"""
+
+    def __init__(
+            self,
+            writer: "FileWriter",
+            fd: int,
+            offset: int,
+            callback: Callable[[int], None] = None,
+    ):
+        self.writer = writer
+        self.loop = get_running_loop()  # 回调所在的事件循环
+        self.fd = fd
+        self.offset = offset
+        self.callback = callback
+        self.error: OSError | None = None
+
+    async def write(self, data: bytes, ):
+        await self.writer.write(self, data, )
+
+    async def close(self):
+        await self.writer.close(self)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+
+class FileWriter:
+    """独立的磁盘写入线程，合并同一文件的连续数据块为较大的写入操作，写入进度批量回调至事件循环；
+    写入线程在程序运行期间复用，程序退出时调用 shutdown 等待数据全部写入"""
+
+    def __init__(self, buffer: int = WRITE_BUFFER, limit: int = WRITE_LIMIT, ):
+        self.buffer = buffer  # 单次合并写入的最大字节数
+        self.limit = limit  # 等待写入的最大字节数，超出时暂停接收数据
+        self.queue = SimpleQueue()
+        self.thread: Thread | None = None
+        self.loop: AbstractEventLoop | None = None
+        self.available: Event | None = None
+        self.pending = 0
+
+    def open(self, path: Path, offset: int = None, callback: Callable[[int], None] = None, ) -> WriteHandle:
+        """打开文件，offset 为空时追加写入；callback 在数据实际写入磁盘后以写入字节数调用"""
+        self.__start()
+        fd = os_open(path, O_WRONLY | O_CREAT | O_BINARY)
+        if offset is None:
+            offset = lseek(fd, 0, SEEK_END)
+        return WriteHandle(self, fd, offset, callback, )
+
+    def __start(self):
+        if (loop := get_running_loop()) is not self.loop:
+            # 流量控制状态绑定事件循环，写入线程继续复用
+            self.loop = loop
+            self.available = Event()
+            self.available.set()
+            self.pending = 0
+        if not (self.thread and self.thread.is_alive()):
+            self.thread = Thread(target=self.__run, daemon=True, )
+            self.thread.start()
+
+    def call(self, function: Callable[[], None], ):
+        """在写入线程中按提交顺序执行函数，函数执行时此前提交的数据均已写入"""
+        self.__start()
+        self.queue.put((None, None, function))
+
+    async def write(self, handle: WriteHandle, data: bytes, ):
+        if handle.error:
+            raise handle.error
+        while self.pending >= self.limit:
+            self.available.clear()
+            await self.available.wait()
+        self.pending += len(data)
+        self.queue.put((handle, handle.offset, data))
+        handle.offset += len(data)
+
+    async def close(self, handle: WriteHandle, ):
+        """等待文件数据全部写入后关闭文件"""
+        future = handle.loop.create_future()
+        self.queue.put((handle, None, future))
+        await future
+        if handle.error:
+            raise handle.error
+
+    def shutdown(self):
+        """等待已提交的数据全部写入后结束写入线程"""
+        if self.thread and self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+        self.thread = None
+
+    def __run(self):
+        while (item := self.queue.get()) is not None:
+            items = [item]
+            size = len(item[2]) if item[1] is not None else 0
+            while size < self.buffer and not self.queue.empty():
+                if (item := self.queue.get()) is None:
+                    self.__handle(items)
+                    return
+                items.append(item)
+                if item[1] is not None:
+                    size += len(item[2])
+            self.__handle(items)
+
+    def __handle(self, items: list[tuple]):
+        handle, start, end, parts = None, 0, 0, []
+        for current, offset, data in items:
+            if offset is None:
+                self.__flush(handle, start, parts, )
+                handle, parts = None, []
+                if current:
+                    self.__close(current, data, )
+                else:
+                    self.__call(data)
+            elif current is handle and offset == end:
+                parts.append(data)
+                end += len(data)
+            else:
+                self.__flush(handle, start, parts, )
+                handle, start, end, parts = current, offset, offset + len(data), [data]
+        self.__flush(handle, start, parts, )
+
+    def __flush(self, handle: WriteHandle | None, offset: int, parts: list[bytes], ):
+        if not handle:
+            return
+        data = b"".join(parts)
+        error = None
+        if not handle.error:
+            try:
+                self.__write(handle.fd, data, offset, )
+            except OSError as e:
+                error = e
+        self.__callback(handle.loop, self.__written, handle, len(data), error, )
+
+    @staticmethod
+    def __write(fd: int, data: bytes, offset: int, ):
+        view = memoryview(data)
+        while view:
+            if pwrite:
+                written = pwrite(fd, view, offset, )
+            else:
+                lseek(fd, offset, SEEK_SET)
+                written = write(fd, view)
+            view = view[written:]
+            offset += written
+
+    def __close(self, handle: WriteHandle, future: Future, ):
+        error = None
+        try:
+            close(handle.fd)
+        except OSError as e:
+            error = e
+        self.__callback(handle.loop, self.__closed, handle, future, error, )
+
+    @staticmethod
+    def __call(function: Callable[[], None], ):
+        try:
+            function()
+        except OSError:
+            pass
+
+    @staticmethod
+    def __callback(loop: AbstractEventLoop, function: Callable, *args, ):
+        try:
+            loop.call_soon_threadsafe(function, *args, )
+        except RuntimeError:  # 事件循环已关闭
+            pass
+
+    def __written(self, handle: WriteHandle, size: int, error: OSError | None, ):
+        if handle.loop is self.loop:
+            self.pending -= size
+            if self.pending < self.limit:
+                self.available.set()
+        if error:
+            handle.error = handle.error or error
+        elif not handle.error and handle.callback:
+            handle.callback(size)
+
+    @staticmethod
+    def __closed(handle: WriteHandle, future: Future, error: OSError | None, ):
+        if error:
+            handle.error = handle.error or error
+        if not future.done():
+            future.set_result(None)
@@ -0,0 +1,50 @@
+from functools import lru_cache
+from typing import Any
+from typing import Callable
+
+__all__ = ["compile_path"]
+
+Accessor = Callable[[Any, Any], Any]
+
+
+def parse_path(attribute_chain: str) -> tuple[tuple[str, int | None], ...]:
+    """将 video.play_addr.url_list[-1] 形式的属性链解析为 (键名, 索引) 序列"""
+    steps = []
+    for attribute in attribute_chain.split("."):
+        if "[" in attribute:
+            attribute, index = attribute.split("[", 1)
+            steps.append((attribute, int(index.split("]", 1)[0])))
+        else:
+            steps.append((attribute, None))
+    return tuple(steps)
+
+
+@lru_cache(maxsize=None)
+def compile_path(attribute_chain: str) -> Accessor:
+    """编译属性链为直接读取字典数据的函数，结果按属性链缓存；
+    任一层级缺失、类型不符或值为空时返回默认值"""
+    steps = parse_path(attribute_chain)
+    if len(steps) == 1 and steps[0][1] is None:
+        key = steps[0][0]
+
+        def accessor(data, default="", ):
+            try:
+                return data[key] or default
+            except (KeyError, IndexError, TypeError):
+                return default
+
+        return accessor
+
+    def accessor(data, default="", ):
+        try:
+            for key, index in steps:
+                data = data[key]
+                if index is not None:
+                    data = data[index]
+                if not data:
+                    return default
+        except (KeyError, IndexError, TypeError):
+            return default
+        return data
+
+    return accessor
@@ -1,8 +1,16 @@
+from asyncio import gather
+from asyncio import get_running_loop
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
-from json import dumps
+from math import ceil
+from pickle import PicklingError
 from time import localtime
 from time import strftime
 from types import SimpleNamespace
+from typing import AsyncGenerator
+from typing import AsyncIterable
+from typing import Callable
 from typing import TYPE_CHECKING
 from urllib.parse import urlparse
 
@@ -13,51 +21,33 @@ from ..custom import (
     IMAGE_TIKTOK_INDEX,
     DYNAMIC_COVER_INDEX,
     ORIGIN_COVER_INDEX,
-    MUSIC_INDEX,
-    COMMENT_IMAGE_INDEX,
-    COMMENT_STICKER_INDEX,
-    LIVE_COVER_INDEX,
-    AUTHOR_COVER_INDEX,
-    HOT_WORD_COVER_INDEX,
-    COMMENT_IMAGE_LIST_INDEX,
     BITRATE_INFO_TIKTOK_INDEX,
     LIVE_DATA_INDEX,
-    AVATAR_LARGER_INDEX,
-    AUTHOR_COVER_URL_INDEX,
     SEARCH_USER_INDEX,
-    SEARCH_AVATAR_INDEX,
-    MUSIC_COLLECTION_COVER_INDEX,
-    MUSIC_COLLECTION_DOWNLOAD_INDEX,
 )
+from ..custom import PROCESS_EXTRACT_THRESHOLD
+from ..custom import PROCESS_EXTRACT_WORKERS
 from ..custom import condition_filter
 from ..tools import TikTokDownloaderError
 from ..translation import _
+from .accessor import compile_path
+from .schema import SCHEMAS
 
 if TYPE_CHECKING:
     from ..config import Parameter
+    from ..tools import Cleaner
     from datetime import date
 
-__all__ = ["Extractor"]
+__all__ = ["Extractor", "extract_shard"]
 
 
 class Extractor:
-    statistics_keys = (
-        "digg_count",
-        "comment_count",
-        "collect_count",
-        "share_count",
-        "play_count",
-    )
-    statistics_keys_tiktok = (
-        "diggCount",
-        "commentCount",
-        "collectCount",
-        "shareCount",
-        "playCount",
-    )
     detail_necessary_keys = "id"
+    pool: ProcessPoolExecutor | None = None
     comment_necessary_keys = "cid"
     user_necessary_keys = "sec_uid"
+    # 仅供下载文件使用的内部字段，不储存也不返回给调用方
+    internal_keys = ("mirrors",)
     extract_params_tiktok = {
         "sec_uid": "author.secUid",
         "mix_id": "playlistId",
@@ -73,10 +63,11 @@ class Extractor:
         "mix_title": "mix_info.mix_name",
     }
 
-    def __init__(self, params: "Parameter"):
+    def __init__(self, params: "Parameter", compiled=True, ):
         self.log = params.logger
         self.date_format = params.date_format
         self.cleaner = params.CLEANER
+        self.schemas = self.__generate_schemas(compiled)
         self.type = {
             "batch": self.__batch,
             "detail": self.__detail,
@@ -88,6 +79,23 @@ class Extractor:
             "music": self.__music,
         }
 
+    @property
+    def config(self) -> tuple[str, "Cleaner"]:
+        """子进程重建提取器所需的参数"""
+        return self.date_format, self.cleaner
+
+    def __generate_schemas(self, compiled: bool, ) -> dict[tuple[str, str], Callable[[dict, dict], dict]]:
+        """生成各平台各类数据的提取函数，compiled 为 False 时逐字段解释执行"""
+        transforms = {
+            "date": self.__format_date,
+            "description": self.__clean_description,
+            "duration": self.time_conversion,
+        }
+        return {
+            k: v.compile(transforms) if compiled else v.interpret(transforms)
+            for k, v in SCHEMAS.items()
+        }
+
     def get_user_info(self, data: dict) -> dict:
         try:
             return {
@@ -114,6 +122,8 @@ class Extractor:
     def generate_data_object(
             data: dict | list,
     ) -> SimpleNamespace | list[SimpleNamespace]:
+        """转换为支持属性访问的对象，仅用于配置数据；接口数据直接使用 safe_extract 读取"""
+
         def depth_conversion(element):
             if isinstance(element, dict):
                 return SimpleNamespace(
@@ -127,26 +137,11 @@ class Extractor:
 
     @staticmethod
     def safe_extract(
-            data: SimpleNamespace | list[SimpleNamespace],
+            data: dict | list[dict],
             attribute_chain: str,
-            default: str | int | list | dict | SimpleNamespace = "",
+            default: str | int | list | dict = "",
     ):
-        attributes = attribute_chain.split(".")
-        for attribute in attributes:
-            if "[" in attribute:
-                parts = attribute.split("[", 1)
-                attribute = parts[0]
-                index = parts[1].split("]", 1)[0]
-                try:
-                    index = int(index)
-                    data = getattr(data, attribute, None)[index]
-                except (IndexError, TypeError, ValueError):
-                    return default
-            else:
-                data = getattr(data, attribute, None)
-                if not data:
-                    return default
-        return data or default
+        return compile_path(attribute_chain)(data, default)
 
     async def run(
             self,
@@ -160,6 +155,27 @@ class Extractor:
             raise TikTokDownloaderError
         return await self.type[type_](data, recorder, tiktok, **kwargs)
 
+    async def iter_run(
+            self,
+            pages: AsyncIterable[list[dict]],
+            recorder,
+            type_="detail",
+            tiktok=False,
+            **kwargs,
+    ) -> AsyncGenerator[dict, None]:
+        """逐页提取数据并逐条返回提取结果，数据记录与筛选随每页数据进行，不保留已返回的数据"""
+        if type_ not in self.type.keys():
+            raise TikTokDownloaderError
+        if summary := type_ == "batch":
+            kwargs["summary"] = False
+        count = 0
+        async for page in pages:
+            for item in await self.type[type_](page, recorder, tiktok, **kwargs):
+                count += 1
+                yield item
+        if summary:
+            self.__summary_detail(count)
+
     async def __batch(
             self,
             data: list[dict],
@@ -170,6 +186,7 @@ class Extractor:
             earliest,
             latest,
             same=True,
+            summary=True,
     ) -> list[dict]:
         """批量下载作品"""
         container = SimpleNamespace(
@@ -184,7 +201,7 @@ class Extractor:
             earliest=earliest,
             latest=latest,
         )
-        self.__platform_classify_detail(data, container, tiktok, )
+        await self.__extract_records("detail", container, data, tiktok, )
         container.all_data = self.__clean_extract_data(
             container.all_data,
             self.detail_necessary_keys,
@@ -193,7 +210,8 @@ class Extractor:
         await self.__record_data(recorder, container.all_data)
         self.__date_filter(container)
         self.__condition_filter(container)
-        self.__summary_detail(container.all_data)
+        if summary:
+            self.__summary_detail(len(container.all_data))
         return container.all_data
 
     @staticmethod
@@ -202,88 +220,48 @@ class Extractor:
         result = [i for i in container.all_data if condition_filter(i)]
         container.all_data = result
 
-    def __summary_detail(self, data: list[dict], ):
+    def __summary_detail(self, count: int, ):
         """汇总作品数量"""
-        self.log.info(_("筛选处理后作品数量: {count}").format(count=len(data)))
+        self.log.info(_("筛选处理后作品数量: {count}").format(count=count))
 
     def __extract_batch(
             self,
             container: SimpleNamespace,
-            data: SimpleNamespace,
+            data: dict,
     ) -> None:
         """批量提取作品信息"""
-        container.cache = container.template.copy()
+        container.cache = self.schemas["douyin", "detail"](container.template.copy(), data, )
         self.__extract_detail_info(container.cache, data)
-        self.__extract_account_info(container, data)
-        self.__extract_music(container.cache, data)
-        self.__extract_statistics(container.cache, data)
-        self.__extract_tags(container.cache, data)
-        self.__extract_extra_info(container.cache, data)
-        self.__extract_additional_info(container.cache, data)
+        self.__extract_nickname_info(container, self.safe_extract(data, "author"))
+        self.__extract_additional_info(container.cache)
         container.all_data.append(container.cache)
 
     def __extract_batch_tiktok(
             self,
             container: SimpleNamespace,
-            data: SimpleNamespace,
+            data: dict,
     ) -> None:
         """批量提取作品信息"""
-        container.cache = container.template.copy()
+        container.cache = self.schemas["tiktok", "detail"](container.template.copy(), data, )
         self.__extract_detail_info_tiktok(container.cache, data)
-        self.__extract_account_info_tiktok(container, data)
-        self.__extract_music(container.cache, data, True)
-        self.__extract_statistics_tiktok(container.cache, data)
-        self.__extract_tags_tiktok(container.cache, data)
-        self.__extract_extra_info_tiktok(container.cache, data)
-        self.__extract_additional_info(container.cache, data, True)
+        self.__extract_nickname_info(container, self.safe_extract(data, "author"))
+        self.__extract_additional_info(container.cache, True)
         container.all_data.append(container.cache)
 
-    def __extract_extra_info(
-            self,
-            item: dict,
-            data: SimpleNamespace,
-    ):
-        if e := self.safe_extract(data, "anchor_info"):
-            extra = dumps(
-                e,
-                ensure_ascii=False,
-                indent=2,
-                default=lambda x: vars(x))
-        else:
-            extra = ""
-        item["extra"] = extra
-
-    def __extract_extra_info_tiktok(
-            self,
-            item: dict,
-            data: SimpleNamespace,
-    ):
-        # TODO: 尚未适配 TikTok 额外信息
-        item["extra"] = ""
-
     def __extract_commodity_data(
             self,
             item: dict,
-            data: SimpleNamespace,
+            data: dict,
     ):
         pass
 
     def __extract_game_data(
             self,
             item: dict,
-            data: SimpleNamespace,
+            data: dict,
     ):
         pass
 
-    def __extract_description(self, data: SimpleNamespace) -> str:
-        # 2023/11/11: 抖音不再折叠过长的作品描述
-        return self.safe_extract(data, "desc")
-        # if len(desc := self.safe_extract(data, "desc")) < 107:
-        #     return desc
-        # long_desc = self.safe_extract(data, "share_info.share_link_desc")
-        # return long_desc.split(
-        #     "  ", 1)[-1].split("  %s", 1)[0].replace("# ", "#")
-
     def __clean_description(self, desc: str) -> str:
         return self.cleaner.clear_spaces(self.cleaner.filter(desc))
 
@@ -296,34 +274,23 @@ class Extractor:
     def __extract_detail_info(
             self,
             item: dict,
-            data: SimpleNamespace,
+            data: dict,
     ) -> None:
-        item["id"] = self.safe_extract(data, "aweme_id")
-        item["desc"] = self.__clean_description(
-            self.__extract_description(data),
-        ) or item["id"]
-        item["create_timestamp"] = self.safe_extract(data, "create_time")
-        item["create_time"] = self.__format_date(item["create_timestamp"])
-        self.__extract_text_extra(item, data)
+        item["desc"] = item["desc"] or item["id"]
         self.__classifying_detail(item, data)
 
     def __extract_detail_info_tiktok(
             self,
             item: dict,
-            data: SimpleNamespace,
+            data: dict,
     ) -> None:
-        item["id"] = self.safe_extract(data, "id")
-        item["desc"] = self.__clean_description(
-            self.__extract_description(data)) or item["id"]
-        item["create_timestamp"] = self.safe_extract(data, "createTime", )
-        item["create_time"] = self.__format_date(item["create_timestamp"])
-        self.__extract_text_extra_tiktok(item, data)
+        item["desc"] = item["desc"] or item["id"]
         self.__classifying_detail_tiktok(item, data)
 
     def __classifying_detail(
             self,
             item: dict,
-            data: SimpleNamespace,
+            data: dict,
     ) -> None:
         # 作品分类
         if images := self.safe_extract(data, "images"):
@@ -334,7 +301,7 @@ class Extractor:
     def __classifying_detail_tiktok(
             self,
             item: dict,
-            data: SimpleNamespace,
+            data: dict,
     ) -> None:
         if images := self.safe_extract(data, "imagePost.images"):
             self.__extract_image_info_tiktok(item, data, images)
@@ -344,12 +311,8 @@ class Extractor:
     def __extract_additional_info(
             self,
             item: dict,
-            data: SimpleNamespace,
             tiktok=False,
     ):
-        item["height"] = self.safe_extract(data, "video.height", -1)
-        item["width"] = self.safe_extract(data, "video.width", -1)
-        item["ratio"] = self.safe_extract(data, "video.ratio")
         item["share_url"] = self.__generate_link(
             item["type"],
             item["id"],
@@ -384,8 +347,8 @@ class Extractor:
     def __extract_image_info(
             self,
             item: dict,
-            data: SimpleNamespace,
-            images: list[SimpleNamespace],
+            data: dict,
+            images: list[dict],
     ) -> None:
         if any(
                 self.safe_extract(
@@ -394,36 +357,61 @@ class Extractor:
                 ) for i in images
         ):
             self.__set_blank_data(item, data, _("实况"), )
-            item["downloads"] = [
+            self.__set_download_urls(item, [
                 self.__classify_slides_item(i, ) for i in images
-            ]
+            ])
         else:
             self.__set_blank_data(item, data, _("图集"), )
-            item["downloads"] = [
-                self.safe_extract(
+            self.__set_download_urls(item, [
+                self.__extract_urls(
                     i,
-                    f'url_list[{IMAGE_INDEX}]',
+                    "url_list",
+                    IMAGE_INDEX,
                 ) for i in images
-            ]
+            ])
 
     def __extract_image_info_tiktok(
             self,
             item: dict,
-            data: SimpleNamespace,
+            data: dict,
             images: list,
     ) -> None:
         self.__set_blank_data(item, data, _("图集"), )
-        item["downloads"] = [
-            self.safe_extract(
+        self.__set_download_urls(item, [
+            self.__extract_urls(
                 i,
-                f"imageURL.urlList[{IMAGE_TIKTOK_INDEX}]",
+                "imageURL.urlList",
+                IMAGE_TIKTOK_INDEX,
             ) for i in images
-        ]
+        ])
+
+    @staticmethod
+    def __set_download_urls(item: dict, urls: list[list[str]] | list[str], multiple=True, ) -> None:
+        """downloads 保存首选下载地址，mirrors 按下载任务键名保存全部候选下载地址"""
+        if multiple:
+            item["downloads"] = [i[0] if i else "" for i in urls]
+            item["mirrors"] = {f"downloads:{index}": i for index, i in enumerate(urls)}
+        else:
+            item["downloads"] = urls[0] if urls else ""
+            item["mirrors"] = {"downloads": urls}
+
+    @classmethod
+    def __extract_urls(cls, data: dict, attribute_chain: str, index: int, ) -> list[str]:
+        return cls.__order_urls(cls.safe_extract(data, attribute_chain, []), index, )
+
+    @staticmethod
+    def __order_urls(urls: list[str], index: int, ) -> list[str]:
+        """首选下载地址排在首位，其余镜像地址保持原有顺序"""
+        try:
+            first = urls[index]
+        except (IndexError, TypeError):
+            return []
+        return [first, *(i for i in urls if i != first)] if first else []
 
     def __set_blank_data(
             self,
             item: dict,
-            data: SimpleNamespace,
+            data: dict,
             type_=_("图集"),
     ):
         item["type"] = type_
@@ -434,40 +422,40 @@ class Extractor:
     def __extract_video_info(
             self,
             item: dict,
-            data: SimpleNamespace,
+            data: dict,
             type_=_("视频"),
     ) -> None:
         item["type"] = type_
-        item["downloads"] = self.__extract_video_download(data, )
+        self.__set_download_urls(item, self.__extract_video_download(data, ), False, )
         item["duration"] = self.time_conversion(
             self.safe_extract(data, "video.duration", 0))
         item["uri"] = self.safe_extract(
             data, "video.play_addr.uri")
         self.__extract_cover(item, data, True)
 
-    def __classify_slides_item(self, item: SimpleNamespace, ) -> str:
+    def __classify_slides_item(self, item: dict, ) -> list[str]:
         if self.safe_extract(item, "video"):
             return self.__extract_video_download(item, )
-        return self.safe_extract(item, f'url_list[{IMAGE_INDEX}]')
+        return self.__extract_urls(item, "url_list", IMAGE_INDEX, )
 
-    def __extract_video_download(self, data: SimpleNamespace, ) -> str:
-        bit_rate: list[SimpleNamespace] = self.safe_extract(
+    def __extract_video_download(self, data: dict, ) -> list[str]:
+        bit_rate: list[dict] = self.safe_extract(
             data,
             "video.bit_rate",
             [],
         )
         try:
             bit_rate: list[tuple[int, int, int, int, int, list[str]]] = [(
-                i.FPS,
-                i.bit_rate,
-                i.play_addr.data_size,
-                i.play_addr.height,
-                i.play_addr.width,
-                i.play_addr.url_list,
+                i["FPS"],
+                i["bit_rate"],
+                i["play_addr"]["data_size"],
+                i["play_addr"]["height"],
+                i["play_addr"]["width"],
+                i["play_addr"]["url_list"],
             ) for i in bit_rate]
-        except AttributeError:
+        except (KeyError, TypeError):
             self.log.error(f"提取视频下载地址失败: {data}", False, )
-            return ""
+            return []
         bit_rate.sort(
             key=lambda x: (
                 max(x[3], x[4], ),
@@ -476,12 +464,12 @@ class Extractor:
                 x[2],
             ),
         )
-        return bit_rate[-1][-1][VIDEO_INDEX] if bit_rate else ""
+        return self.__order_urls(bit_rate[-1][-1], VIDEO_INDEX, ) if bit_rate else []
 
     def __extract_video_info_tiktok(
             self,
             item: dict,
-            data: SimpleNamespace,
+            data: dict,
             type_=_("视频"),
     ) -> None:
         item["type"] = type_
@@ -489,7 +477,7 @@ class Extractor:
         #     data,
         #     "video.playAddr",
         # )  # 视频文件大小优先
-        item["downloads"] = self.__extract_video_download_tiktok(data, )  # 视频分辨率优先
+        self.__set_download_urls(item, self.__extract_video_download_tiktok(data, ), False, )  # 视频分辨率优先
         item["duration"] = self.time_conversion_tiktok(
             self.safe_extract(
                 data,
@@ -502,23 +490,23 @@ class Extractor:
         )
         self.__extract_cover_tiktok(item, data, True)
 
-    def __extract_video_download_tiktok(self, data: SimpleNamespace, ) -> str:
-        bitrate_info: list[SimpleNamespace] = self.safe_extract(
+    def __extract_video_download_tiktok(self, data: dict, ) -> list[str]:
+        bitrate_info: list[dict] = self.safe_extract(
             data,
             "video.bitrateInfo",
             [],
         )
         try:
             bitrate_info: list[tuple[int, str, int, int, list[str]]] = [(
-                i.Bitrate,
-                i.PlayAddr.DataSize,
-                i.PlayAddr.Height,
-                i.PlayAddr.Width,
-                i.PlayAddr.UrlList,
+                i["Bitrate"],
+                i["PlayAddr"]["DataSize"],
+                i["PlayAddr"]["Height"],
+                i["PlayAddr"]["Width"],
+                i["PlayAddr"]["UrlList"],
             ) for i in bitrate_info]
-        except AttributeError:
+        except (KeyError, TypeError):
             self.log.error(f"提取视频下载地址失败: {data}", False, )
-            return ""
+            return []
         bitrate_info.sort(
             key=lambda x: (
                 max(x[2], x[3], ),
@@ -526,7 +514,7 @@ class Extractor:
                 x[1],
             ),
         )
-        return bitrate_info[-1][-1][VIDEO_TIKTOK_INDEX] if bitrate_info else ""
+        return self.__order_urls(bitrate_info[-1][-1], VIDEO_TIKTOK_INDEX, ) if bitrate_info else []
 
     @staticmethod
     def time_conversion(time_: int) -> str:
@@ -540,38 +528,10 @@ class Extractor:
         return '{:02d}:{:02d}:{:02d}'.format(
             int(hours), int(minutes), int(seconds))
 
-    def __extract_text_extra(
-            self,
-            item: dict,
-            data: SimpleNamespace,
-    ):
-        """作品标签"""
-        text = [
-            self.safe_extract(i, "hashtag_name")
-            for i in self.safe_extract(
-                data, "text_extra", []
-            )
-        ]
-        item["text_extra"] = [i for i in text if i]
-
-    def __extract_text_extra_tiktok(
-            self,
-            item: dict,
-            data: SimpleNamespace,
-    ):
-        """作品标签"""
-        text = [
-            self.safe_extract(i, "hashtagName")
-            for i in self.safe_extract(
-                data, "textExtra", []
-            )
-        ]
-        item["text_extra"] = [i for i in text if i]
-
     def __extract_cover(
             self,
             item: dict,
-            data: SimpleNamespace,
+            data: dict,
             has=False,
     ) -> None:
         if has:
@@ -587,7 +547,7 @@ class Extractor:
     def __extract_cover_tiktok(
             self,
             item: dict,
-            data: SimpleNamespace,
+            data: dict,
             has=False,
     ) -> None:
         if has:
@@ -600,98 +560,10 @@ class Extractor:
         else:
             item["dynamic_cover"], item["origin_cover"] = "", ""
 
-    def __extract_music(
-            self,
-            item: dict,
-            data: SimpleNamespace,
-            tiktok=False,
-    ) -> None:
-        if music_data := self.safe_extract(data, "music"):
-            if tiktok:
-                author = self.safe_extract(music_data, "authorName")
-                title = self.safe_extract(music_data, "title")
-                url = self.safe_extract(
-                    music_data, "playUrl")
-            else:
-                author = self.safe_extract(music_data, "author")
-                title = self.safe_extract(music_data, "title")
-                url = self.safe_extract(
-                    music_data, f"play_url.url_list[{MUSIC_INDEX}]",
-                )  # 部分作品的音乐无法下载
-
-        else:
-            author, title, url = "", "", ""
-        item["music_author"] = author
-        item["music_title"] = title
-        item["music_url"] = url
-
-    def __extract_statistics(self, item: dict, data: SimpleNamespace) -> None:
-        data = self.safe_extract(data, "statistics")
-        for i in self.statistics_keys:
-            item[i] = self.safe_extract(data, i, -1, )
-
-    def __extract_statistics_tiktok(
-            self,
-            item: dict,
-            data: SimpleNamespace,
-    ) -> None:
-        data = self.safe_extract(data, "stats")
-        for i, j in enumerate(self.statistics_keys_tiktok):
-            item[self.statistics_keys[i]] = self.safe_extract(data, j, -1, )
-
-    def __extract_tags(
-            self,
-            item: dict,
-            data: SimpleNamespace,
-    ) -> None:
-        if not (t := self.safe_extract(data, "video_tag")):
-            item["tag"] = []
-        else:
-            item["tag"] = [self.safe_extract(i, "tag_name") for i in t]
-
-    def __extract_tags_tiktok(
-            self,
-            item: dict,
-            data: SimpleNamespace,
-    ) -> None:
-        if not (t := self.safe_extract(data, "textExtra")):
-            item["tag"] = []
-        else:
-            item["tag"] = [self.safe_extract(i, "hashtagName") for i in t]
-
-    def __extract_account_info(
-            self,
-            container: SimpleNamespace,
-            data: SimpleNamespace,
-            key="author",
-    ) -> None:
-        data = self.safe_extract(data, key)
-        container.cache["uid"] = self.safe_extract(data, "uid")
-        container.cache["sec_uid"] = self.safe_extract(data, "sec_uid")
-        # container.cache["short_id"] = self.safe_extract(data, "short_id")
-        container.cache["unique_id"] = self.safe_extract(data, "unique_id", )
-        container.cache["signature"] = self.safe_extract(data, "signature")
-        container.cache["user_age"] = self.safe_extract(data, "user_age", -1)
-        self.__extract_nickname_info(container, data)
-
-    def __extract_account_info_tiktok(
-            self,
-            container: SimpleNamespace,
-            data: SimpleNamespace,
-            key="author",
-    ) -> None:
-        data = self.safe_extract(data, key)
-        container.cache["uid"] = self.safe_extract(data, "id")
-        container.cache["sec_uid"] = self.safe_extract(data, "secUid")
-        container.cache["unique_id"] = self.safe_extract(data, "uniqueId")
-        container.cache["signature"] = self.safe_extract(data, "signature")
-        container.cache["user_age"] = -1
-        self.__extract_nickname_info(container, data)
-
     def __extract_nickname_info(
             self,
             container: SimpleNamespace,
-            data: SimpleNamespace,
+            data: dict,
     ) -> None:
         if container.same:
             container.cache["nickname"] = container.name
@@ -787,14 +659,13 @@ class Extractor:
     ):
         """从多个数据返回对象"""
         for item in data:
-            item = self.generate_data_object(item)
             if id_ == self.safe_extract(item, key):
                 return item
         raise TikTokDownloaderError(_("提取账号信息或合集信息失败，请向作者反馈！"))
 
     def __extract_pretreatment_data(
             self,
-            item: SimpleNamespace,
+            item: dict,
             id_: str,
             name: str,
             mark: str,
@@ -811,6 +682,71 @@ class Extractor:
         mark = self.cleaner.filter_name(mark, name, )
         return id_, name.strip(), mark.strip()
 
+    def extract_records(
+            self,
+            kind: str,
+            container: SimpleNamespace,
+            data: list[dict],
+            tiktok: bool,
+    ) -> None:
+        """提取作品或评论数据至 container.all_data，不涉及事件循环，可在子进程中调用"""
+        match kind:
+            case "detail":
+                self.__platform_classify_detail(data, container, tiktok, )
+            case "comment":
+                [self.__extract_comments_data(container, i) for i in data]
+            case _:
+                raise TikTokDownloaderError
+
+    async def __extract_records(
+            self,
+            kind: str,
+            container: SimpleNamespace,
+            data: list[dict],
+            tiktok: bool,
+    ) -> None:
+        """数据量达到阈值时分片提交至进程池提取，按原有顺序合并结果"""
+        if not PROCESS_EXTRACT_THRESHOLD or len(data) < PROCESS_EXTRACT_THRESHOLD:
+            self.extract_records(kind, container, data, tiktok, )
+            return
+        loop = get_running_loop()
+        size = ceil(len(data) / PROCESS_EXTRACT_WORKERS)
+        state = vars(container) | {"all_data": [], "cache": None, }
+        try:
+            results = await gather(*(
+                loop.run_in_executor(
+                    self.__pool(),
+                    extract_shard,
+                    self.config,
+                    kind,
+                    state,
+                    data[i:i + size],
+                    tiktok,
+                ) for i in range(0, len(data), size)
+            ))
+        except (BrokenProcessPool, PicklingError, OSError) as e:
+            self.log.warning(_("多进程提取数据失败，将在当前进程提取数据: {error}").format(error=e))
+            if isinstance(e, BrokenProcessPool):
+                self.shutdown()
+            self.extract_records(kind, container, data, tiktok, )
+            return
+        for records, logs in results:
+            container.all_data.extend(records)
+            for level, text, output in logs:
+                getattr(self.log, level)(text, output, )
+
+    @classmethod
+    def __pool(cls) -> ProcessPoolExecutor:
+        if not cls.pool:
+            cls.pool = ProcessPoolExecutor(max_workers=PROCESS_EXTRACT_WORKERS)
+        return cls.pool
+
+    @classmethod
+    def shutdown(cls):
+        if cls.pool:
+            cls.pool.shutdown(wait=False, cancel_futures=True, )
+            cls.pool = None
+
     def __platform_classify_detail(
             self,
             data: list[dict],
@@ -821,14 +757,14 @@ class Extractor:
             [
                 self.__extract_batch_tiktok(
                     container,
-                    self.generate_data_object(item),
+                    item,
                 ) for item in data
             ]
         else:
             [
                 self.__extract_batch(
                     container,
-                    self.generate_data_object(item),
+                    item,
                 )
                 for item in data
             ]
@@ -847,7 +783,7 @@ class Extractor:
             cache=None,
             same=False,
         )
-        self.__platform_classify_detail(data, container, tiktok, )
+        await self.__extract_records("detail", container, data, tiktok, )
         container.all_data = self.__clean_extract_data(
             container.all_data, self.detail_necessary_keys)
         self.__extract_item_records(container.all_data)
@@ -875,8 +811,7 @@ class Extractor:
         if source:
             container.all_data = data
         else:
-            [self.__extract_comments_data(
-                container, self.generate_data_object(i)) for i in data]
+            await self.__extract_records("comment", container, data, tiktok, )
             container.all_data = self.__clean_extract_data(
                 container.all_data, self.comment_necessary_keys)
             await self.__record_data(recorder, container.all_data)
@@ -885,26 +820,10 @@ class Extractor:
     def __extract_comments_data(
             self,
             container: SimpleNamespace,
-            data: SimpleNamespace,
+            data: dict,
     ):
-        container.cache = container.template.copy()
-        container.cache["create_timestamp"] = self.safe_extract(
-            data, "create_time")
-        container.cache["create_time"] = self.__format_date(
-            container.cache["create_timestamp"])
-        container.cache["ip_label"] = self.safe_extract(data, "ip_label", "未知")
-        container.cache["text"] = self.safe_extract(data, "text")
-        container.cache["image"] = self.safe_extract(
-            data, f"image_list[{COMMENT_IMAGE_LIST_INDEX}].origin_url.url_list[{COMMENT_IMAGE_INDEX}]")
-        container.cache["sticker"] = self.safe_extract(
-            data, f"sticker.static_url.url_list[{COMMENT_STICKER_INDEX}]")
-        container.cache["digg_count"] = self.safe_extract(data, "digg_count", -1)
-        container.cache["reply_to_reply_id"] = self.safe_extract(
-            data, "reply_to_reply_id")
-        container.cache["reply_comment_total"] = self.safe_extract(data, "reply_comment_total", 0)
-        container.cache["reply_id"] = self.safe_extract(data, "reply_id")
-        container.cache["cid"] = self.safe_extract(data, "cid")
-        self.__extract_account_info(container, data, "user")
+        container.cache = self.schemas["douyin", "comment"](container.template.copy(), data, )
+        self.__extract_nickname_info(container, self.safe_extract(data, "user"))
         container.all_data.append(container.cache)
 
     @classmethod
@@ -914,7 +833,6 @@ class Extractor:
             cache=None,
         )
         for item in data:
-            item = cls.generate_data_object(item)
             container.cache = {
                 "reply_comment_total": cls.safe_extract(
                     item,
@@ -941,64 +859,29 @@ class Extractor:
         container = SimpleNamespace(all_data=[])
         if tiktok:
             [self.__extract_live_data_tiktok(
-                container, self.generate_data_object(i)) for i in data]
+                container, i) for i in data]
         else:
             [self.__extract_live_data(
-                container, self.generate_data_object(i)) for i in data]
+                container, i) for i in data]
         return container.all_data
 
     def __extract_live_data(
             self,
             container: SimpleNamespace,
-            data: SimpleNamespace,
+            data: dict,
     ):
         data = self.safe_extract(
             data, f"data.data[{LIVE_DATA_INDEX}]") or self.safe_extract(
             data, "data.room")
-        live_data = {
-            "status": self.safe_extract(data, "status"),
-            "nickname": self.safe_extract(data, "owner.nickname"),
-            "title": self.safe_extract(data, "title"),
-            "flv_pull_url": vars(
-                self.safe_extract(
-                    data,
-                    "stream_url.flv_pull_url",
-                    SimpleNamespace(),
-                )
-            ),
-            "hls_pull_url_map": vars(
-                self.safe_extract(
-                    data,
-                    "stream_url.hls_pull_url_map",
-                    SimpleNamespace(),
-                )
-            ),
-            "cover": self.safe_extract(data, f"cover.url_list[{LIVE_COVER_INDEX}]"),
-            "total_user_str": self.safe_extract(data, "stats.total_user_str"),
-            "user_count_str": self.safe_extract(data, "stats.user_count_str"),
-        }
-        container.all_data.append(live_data)
+        container.all_data.append(self.schemas["douyin", "live"]({}, data, ))
 
     def __extract_live_data_tiktok(
             self,
             container: SimpleNamespace,
-            data: SimpleNamespace,
+            data: dict,
     ):
         data = self.safe_extract(data, "data")
-        live_data = {
-            "create_time": datetime.fromtimestamp(t) if (
-                t := self.safe_extract(data, "create_time")) else "未知",
-            "id_str": self.safe_extract(data, "id_str"),
-            "like_count": self.safe_extract(data, "like_count"),
-            "nickname": self.safe_extract(data, "owner.nickname"),
-            "display_id": self.safe_extract(data, "owner.display_id"),
-            "title": self.safe_extract(data, "title"),
-            "user_count": self.safe_extract(data, "user_count"),
-            "flv_pull_url": vars(self.safe_extract(data, "stream_url.flv_pull_url")),
-            "message": self.safe_extract(data, "message"),
-            "prompts": self.safe_extract(data, "prompts"),
-        }
-        container.all_data.append(live_data)
+        container.all_data.append(self.schemas["tiktok", "live"]({}, data, ))
 
     async def __user(
             self,
@@ -1014,7 +897,7 @@ class Extractor:
             },
         )
         [self.__extract_user_data(container,
-                                  self.generate_data_object(i)) for i in data]
+                                  i) for i in data]
         container.all_data = self.__clean_extract_data(
             container.all_data, self.user_necessary_keys)
         await self.__record_data(recorder, container.all_data)
@@ -1023,40 +906,9 @@ class Extractor:
     def __extract_user_data(
             self,
             container: SimpleNamespace,
-            data: SimpleNamespace,
+            data: dict,
     ):
-        container.cache = container.template.copy()
-        container.cache["avatar"] = self.safe_extract(
-            data, f"avatar_larger.url_list[{AVATAR_LARGER_INDEX}]")
-        container.cache["city"] = self.safe_extract(data, "city")
-        container.cache["country"] = self.safe_extract(data, "country")
-        container.cache["district"] = self.safe_extract(data, "district")
-        container.cache["favoriting_count"] = self.safe_extract(data, "favoriting_count", -1)
-        container.cache["follower_count"] = self.safe_extract(data, "follower_count", -1)
-        container.cache["max_follower_count"] = self.safe_extract(data, "max_follower_count", -1)
-        container.cache["following_count"] = self.safe_extract(data, "following_count", -1)
-        container.cache["total_favorited"] = self.safe_extract(data, "total_favorited", -1)
-        container.cache["gender"] = {1: "男", 2: "女"}.get(
-            self.safe_extract(data, "gender"),
-            "未知",
-        )
-        container.cache["ip_location"] = self.safe_extract(data, "ip_location")
-        container.cache["nickname"] = self.safe_extract(data, "nickname")
-        container.cache["province"] = self.safe_extract(data, "province")
-        container.cache["school_name"] = self.safe_extract(data, "school_name")
-        container.cache["sec_uid"] = self.safe_extract(data, "sec_uid")
-        container.cache["signature"] = self.safe_extract(data, "signature")
-        container.cache["uid"] = self.safe_extract(data, "uid")
-        container.cache["unique_id"] = self.safe_extract(data, "unique_id")
-        container.cache["user_age"] = self.safe_extract(data, "user_age", -1)
-        container.cache["cover"] = self.safe_extract(
-            data, f"cover_url[{AUTHOR_COVER_URL_INDEX}].url_list[{AUTHOR_COVER_INDEX}]")
-        container.cache["short_id"] = self.safe_extract(data, "short_id")
-        container.cache["aweme_count"] = self.safe_extract(data, "aweme_count", -1)
-        container.cache["verify"] = self.safe_extract(
-            data, "custom_verify", "无")
-        container.cache["enterprise"] = self.safe_extract(
-            data, "enterprise_verify_reason", "无")
+        container.cache = self.schemas["douyin", "user"](container.template.copy(), data, )
         container.cache["url"] = f"https://www.douyin.com/user/{container.cache['sec_uid']}"
         container.all_data.append(container.cache)
 
@@ -1084,14 +936,14 @@ class Extractor:
             same=False,
         )
         [self.__search_result_classify(
-            container, self.generate_data_object(i)) for i in data]
+            container, i) for i in data]
         await self.__record_data(recorder, container.all_data)
         return container.all_data
 
     def __search_result_classify(
             self,
             container: SimpleNamespace,
-            data: SimpleNamespace,
+            data: dict,
     ):
         if d := self.safe_extract(data, "aweme_info"):
             self.__extract_batch(container, d)
@@ -1122,38 +974,10 @@ class Extractor:
                 "collection_time": datetime.now().strftime(self.date_format),
             },
         )
-        [self.__deal_search_user_live(container, self.generate_data_object(
-            i["user_info"])) for i in data]
+        [self.__deal_search_user(container, i["user_info"]) for i in data]
         await self.__record_data(recorder, container.all_data)
         return container.all_data
 
-    def __deal_search_user_live(
-            self,
-            container: SimpleNamespace,
-            data: SimpleNamespace,
-            user=True,
-    ):
-        if user:
-            container.cache = container.template.copy()
-        container.cache["avatar"] = self.safe_extract(
-            data, f"{'avatar_thumb' if user else 'avatar_larger'}.url_list[{SEARCH_AVATAR_INDEX}]")
-        container.cache["nickname"] = self.safe_extract(data, "nickname")
-        container.cache["sec_uid"] = self.safe_extract(data, "sec_uid")
-        container.cache["signature"] = self.safe_extract(data, "signature")
-        container.cache["uid"] = self.safe_extract(data, "uid")
-        container.cache["short_id"] = self.safe_extract(data, "short_id")
-        container.cache["verify"] = self.safe_extract(
-            data, "custom_verify", "无")
-        container.cache["enterprise"] = self.safe_extract(
-            data, "enterprise_verify_reason", "无")
-        if user:
-            container.cache["follower_count"] = self.safe_extract(data, "follower_count", -1)
-            container.cache["total_favorited"] = self.safe_extract(data, "total_favorited", -1)
-            container.cache["unique_id"] = self.safe_extract(data, "unique_id")
-            container.all_data.append(container.cache)
-        # else:
-        #     pass
-
     async def __search_live(
             self,
             data: list[dict],
@@ -1167,20 +991,24 @@ class Extractor:
             },
         )
         [self.__deal_search_live(
-            container, self.generate_data_object(i)) for i in data]
+            container, i) for i in data]
         await self.__record_data(recorder, container.all_data)
         return container.all_data
 
+    def __deal_search_user(
+            self,
+            container: SimpleNamespace,
+            data: dict,
+    ):
+        container.cache = self.schemas["douyin", "search_user"](container.template.copy(), data, )
+        container.all_data.append(container.cache)
+
     def __deal_search_live(
             self,
             container: SimpleNamespace,
-            data: SimpleNamespace,
+            data: dict,
     ):
-        container.cache = container.template.copy()
-        self.__deal_search_user_live(
-            container, self.safe_extract(
-                data, "author"), False)
-        container.cache["room_id"] = self.safe_extract(data, "aweme_id")
+        container.cache = self.schemas["douyin", "search_live"](container.template.copy(), data, )
         container.all_data.append(container.cache)
 
     async def __hot(
@@ -1190,28 +1018,18 @@ class Extractor:
             tiktok: bool,
     ) -> list[dict]:
         all_data = []
-        [self.__deal_hot_data(all_data, self.generate_data_object(i))
+        [self.__deal_hot_data(all_data, i)
          for i in data]
         await self.__record_data(recorder, all_data)
         return all_data
 
-    def __deal_hot_data(self, container: list, data: SimpleNamespace):
-        cache = {
-            "position": str(self.safe_extract(data, "position", -1)),
-            "sentence_id": self.safe_extract(data, "sentence_id"),
-            "word": self.safe_extract(data, "word"),
-            "video_count": str(self.safe_extract(data, "video_count", -1)),
-            "event_time": self.__format_date(self.safe_extract(data, "event_time")),
-            "view_count": str(self.safe_extract(data, "view_count", -1)),
-            "hot_value": str(self.safe_extract(data, "hot_value", -1)),
-            "cover": self.safe_extract(data, f"word_cover.url_list[{HOT_WORD_COVER_INDEX}]"),
-        }
-        container.append(cache)
+    def __deal_hot_data(self, container: list, data: dict):
+        container.append(self.schemas["douyin", "hot"]({}, data, ))
 
     async def __record_data(self, record, data: list[dict]):
         # 记录数据
-        for i in data:
-            await record.save(self.__extract_values(record, i))
+        if data:
+            await record.save_many([self.__extract_values(record, i) for i in data])
 
     @staticmethod
     def __extract_values(record, data: dict) -> list:
@@ -1266,12 +1084,11 @@ class Extractor:
             create_time = datetime.fromtimestamp(create_time).date()
             if earliest <= create_time <= latest:
                 result.append(item)
-        self.__summary_detail(result)
+        self.__summary_detail(len(result))
         return result
 
     @classmethod
     def extract_mix_id(cls, data: dict) -> str:
-        data = cls.generate_data_object(data)
         return cls.safe_extract(data, "mix_info.mix_id")
 
     def __extract_item_records(self, data: list[dict]):
@@ -1281,7 +1098,6 @@ class Extractor:
 
     @classmethod
     def extract_mix_collect_info(cls, data: list[dict]) -> list[dict]:
-        data = cls.generate_data_object(data)
         return [
             {
                 "title": Extractor.safe_extract(i, "mix_name"),
@@ -1292,7 +1108,6 @@ class Extractor:
 
     @classmethod
     def extract_collects_info(cls, data: list[dict]) -> list[dict]:
-        data = cls.generate_data_object(data)
         return [
             {
                 "name": Extractor.safe_extract(i, "collects_name"),
@@ -1301,6 +1116,14 @@ class Extractor:
             for i in data
         ]
 
+    @classmethod
+    def clean_internal_data(cls, data: list[dict]) -> list[dict]:
+        """移除提取结果中仅供下载文件使用的内部字段"""
+        for item in data:
+            for key in cls.internal_keys:
+                item.pop(key, None)
+        return data
+
     @staticmethod
     def __clean_extract_data(data: list[dict], key: str) -> list[dict]:
         # 去除无效数据
@@ -1324,7 +1147,7 @@ class Extractor:
         [
             self.__extract_collection_music(
                 container,
-                self.generate_data_object(item),
+                item,
             ) for item in data
         ]
         return container.all_data
@@ -1332,17 +1155,43 @@ class Extractor:
     def __extract_collection_music(
             self,
             container: SimpleNamespace,
-            data: SimpleNamespace,
+            data: dict,
     ):
-        container.cache = container.template.copy()
-        container.cache["id"] = self.safe_extract(data, "id_str")
-        container.cache["title"] = self.safe_extract(data, "title")
-        container.cache["author"] = self.safe_extract(data, "author")
-        container.cache["album"] = self.safe_extract(data, "album")
-        container.cache["cover"] = self.safe_extract(
-            data, f"cover_hd.url_list[{MUSIC_COLLECTION_COVER_INDEX}]")
-        container.cache["download"] = self.safe_extract(
-            data, f"play_url.url_list[{MUSIC_COLLECTION_DOWNLOAD_INDEX}]")
-        container.cache["duration"] = self.time_conversion(
-            self.safe_extract(data, "duration", 0))
+        container.cache = self.schemas["douyin", "music"](container.template.copy(), data, )
         container.all_data.append(container.cache)
+
+
+class ShardLogger:
+    """记录子进程中产生的日志，由主进程按顺序输出"""
+
+    def __init__(self):
+        self.records: list[tuple[str, str, bool]] = []
+
+    def info(self, text: str, output=True, **kwargs):
+        self.records.append(("info", text, output))
+
+    def warning(self, text: str, output=True, **kwargs):
+        self.records.append(("warning", text, output))
+
+    def error(self, text: str, output=True, **kwargs):
+        self.records.append(("error", text, output))
+
+
+def extract_shard(
+        config: tuple[str, "Cleaner"],
+        kind: str,
+        state: dict,
+        data: list[dict],
+        tiktok: bool,
+) -> tuple[list[dict], list[tuple[str, str, bool]]]:
+    """进程池任务，提取一个分片的数据，返回提取结果与日志记录"""
+    date_format, cleaner = config
+    logger = ShardLogger()
+    extractor = Extractor(SimpleNamespace(
+        logger=logger,
+        date_format=date_format,
+        CLEANER=cleaner,
+    ))
+    container = SimpleNamespace(**state)
+    extractor.extract_records(kind, container, data, tiktok, )
+    return container.all_data, logger.records
@@ -0,0 +1,338 @@
+from datetime import datetime
+from json import dumps
+from typing import Any
+from typing import Callable
+
+from ..custom import (
+    MUSIC_INDEX,
+    COMMENT_IMAGE_INDEX,
+    COMMENT_STICKER_INDEX,
+    LIVE_COVER_INDEX,
+    AUTHOR_COVER_INDEX,
+    HOT_WORD_COVER_INDEX,
+    COMMENT_IMAGE_LIST_INDEX,
+    AVATAR_LARGER_INDEX,
+    AUTHOR_COVER_URL_INDEX,
+    SEARCH_AVATAR_INDEX,
+    MUSIC_COLLECTION_COVER_INDEX,
+    MUSIC_COLLECTION_DOWNLOAD_INDEX,
+)
+from .accessor import compile_path
+from .accessor import parse_path
+
+__all__ = ["Field", "Schema", "SCHEMAS"]
+
+Extract = Callable[[dict, dict], dict]
+
+STATISTICS_KEYS = (
+    "digg_count",
+    "comment_count",
+    "collect_count",
+    "share_count",
+    "play_count",
+)
+STATISTICS_KEYS_TIKTOK = (
+    "diggCount",
+    "commentCount",
+    "collectCount",
+    "shareCount",
+    "playCount",
+)
+
+
+class Field:
+    """提取字段：输出键名、数据路径、默认值与转换函数；
+    path 为空时直接写入默认值，transform 为字符串时在编译时从 transforms 中查找"""
+
+    __slots__ = ("key", "path", "default", "transform",)
+
+    def __init__(
+            self,
+            key: str,
+            path: str | None,
+            default: Any = "",
+            transform: str | Callable[[Any], Any] = None,
+    ):
+        self.key = key
+        self.path = path
+        self.default = default
+        self.transform = transform
+
+
+class Schema:
+    """声明式提取规则，可编译为单次遍历的提取函数，也可逐字段解释执行"""
+
+    def __init__(self, *fields: Field):
+        self.fields = fields
+
+    @staticmethod
+    def __resolve(field: Field, transforms: dict[str, Callable], ) -> Callable | None:
+        if isinstance(field.transform, str):
+            return transforms[field.transform]
+        return field.transform
+
+    def interpret(self, transforms: dict[str, Callable] = None, ) -> Extract:
+        """逐字段读取数据，用于对比编译后的提取函数"""
+        transforms = transforms or {}
+        fields = [(i, self.__resolve(i, transforms)) for i in self.fields]
+
+        def extract(item: dict, data: dict, ) -> dict:
+            for field, transform in fields:
+                value = compile_path(field.path)(data, field.default) if field.path else field.default
+                item[field.key] = transform(value) if transform else value
+            return item
+
+        return extract
+
+    def compile(self, transforms: dict[str, Callable] = None, ) -> Extract:
+        """生成提取函数，多个字段共用的首层数据只读取一次"""
+        transforms = transforms or {}
+        prefixes = self.__shared_prefixes()
+        namespace = {}
+        hoisted = {}
+        lines = ["def extract(item, data):"]
+        for index, field in enumerate(self.fields):
+            namespace[f"d{index}"] = field.default
+            if not field.path:
+                value = f"d{index}"
+            else:
+                source, path = "data", field.path
+                prefix, rest = path.partition(".")[::2]
+                if prefix in prefixes and rest:
+                    if prefix not in hoisted:
+                        hoisted[prefix] = f"p{len(hoisted)}"
+                        namespace[f"{hoisted[prefix]}_get"] = compile_path(prefix)
+                        lines.append(f"    {hoisted[prefix]} = {hoisted[prefix]}_get(data, None)")
+                    source, path = hoisted[prefix], rest
+                namespace[f"a{index}"] = compile_path(path)
+                value = f"a{index}({source}, d{index})"
+            if transform := self.__resolve(field, transforms):
+                namespace[f"t{index}"] = transform
+                value = f"t{index}({value})"
+            lines.append(f"    item[{field.key!r}] = {value}")
+        lines.append("    return item")
+        exec("\n".join(lines), namespace)
+        return namespace["extract"]
+
+    def __shared_prefixes(self) -> set[str]:
+        """查找被多个字段使用且不含索引的首层键名"""
+        count = {}
+        for field in self.fields:
+            if not field.path or "." not in field.path:
+                continue
+            prefix = field.path.split(".", 1)[0]
+            if parse_path(prefix)[0][1] is None:
+                count[prefix] = count.get(prefix, 0) + 1
+        return {k for k, v in count.items() if v > 1}
+
+
+def pluck(key: str, drop_empty=False, ) -> Callable[[list], list]:
+    """读取列表中每个对象的指定键"""
+    accessor = compile_path(key)
+
+    def transform(value: list) -> list:
+        result = [accessor(i) for i in value or ()]
+        return [i for i in result if i] if drop_empty else result
+
+    return transform
+
+
+def to_json(value) -> str:
+    return dumps(value, ensure_ascii=False, indent=2, ) if value else ""
+
+
+def to_mapping(value) -> dict:
+    return value or {}
+
+
+def to_gender(value) -> str:
+    return {1: "男", 2: "女"}.get(value, "未知")
+
+
+def to_datetime(value) -> datetime | str:
+    return datetime.fromtimestamp(value) if value else "未知"
+
+
+def account_fields(prefix: str, tiktok=False, ) -> tuple[Field, ...]:
+    """作品作者或评论用户的账号字段，账号昵称由提取器根据上下文处理"""
+    if tiktok:
+        return (
+            Field("uid", f"{prefix}.id"),
+            Field("sec_uid", f"{prefix}.secUid"),
+            Field("unique_id", f"{prefix}.uniqueId"),
+            Field("signature", f"{prefix}.signature"),
+            Field("user_age", None, -1),
+        )
+    return (
+        Field("uid", f"{prefix}.uid"),
+        Field("sec_uid", f"{prefix}.sec_uid"),
+        # Field("short_id", f"{prefix}.short_id"),
+        Field("unique_id", f"{prefix}.unique_id"),
+        Field("signature", f"{prefix}.signature"),
+        Field("user_age", f"{prefix}.user_age", -1),
+    )
+
+
+def statistics_fields(prefix: str, keys: tuple[str, ...], ) -> tuple[Field, ...]:
+    """作品统计字段，统一使用抖音的键名输出"""
+    return tuple(Field(i, f"{prefix}.{j}", -1) for i, j in zip(STATISTICS_KEYS, keys, ))
+
+
+DETAIL = Schema(
+    Field("id", "aweme_id"),
+    # 2023/11/11: 抖音不再折叠过长的作品描述
+    Field("desc", "desc", transform="description"),
+    Field("create_timestamp", "create_time"),
+    Field("create_time", "create_time", transform="date"),
+    Field("text_extra", "text_extra", (), pluck("hashtag_name", True)),
+    *account_fields("author"),
+    Field("music_author", "music.author"),
+    Field("music_title", "music.title"),
+    Field("music_url", f"music.play_url.url_list[{MUSIC_INDEX}]"),  # 部分作品的音乐无法下载
+    *statistics_fields("statistics", STATISTICS_KEYS, ),
+    Field("tag", "video_tag", (), pluck("tag_name")),
+    Field("extra", "anchor_info", transform=to_json),
+    Field("height", "video.height", -1),
+    Field("width", "video.width", -1),
+    Field("ratio", "video.ratio"),
+)
+DETAIL_TIKTOK = Schema(
+    Field("id", "id"),
+    Field("desc", "desc", transform="description"),
+    Field("create_timestamp", "createTime"),
+    Field("create_time", "createTime", transform="date"),
+    Field("text_extra", "textExtra", (), pluck("hashtagName", True)),
+    *account_fields("author", True),
+    Field("music_author", "music.authorName"),
+    Field("music_title", "music.title"),
+    Field("music_url", "music.playUrl"),
+    *statistics_fields("stats", STATISTICS_KEYS_TIKTOK, ),
+    Field("tag", "textExtra", (), pluck("hashtagName")),
+    # TODO: 尚未适配 TikTok 额外信息
+    Field("extra", None),
+    Field("height", "video.height", -1),
+    Field("width", "video.width", -1),
+    Field("ratio", "video.ratio"),
+)
+COMMENT = Schema(
+    Field("create_timestamp", "create_time"),
+    Field("create_time", "create_time", transform="date"),
+    Field("ip_label", "ip_label", "未知"),
+    Field("text", "text"),
+    Field(
+        "image",
+        f"image_list[{COMMENT_IMAGE_LIST_INDEX}].origin_url.url_list[{COMMENT_IMAGE_INDEX}]",
+    ),
+    Field("sticker", f"sticker.static_url.url_list[{COMMENT_STICKER_INDEX}]"),
+    Field("digg_count", "digg_count", -1),
+    Field("reply_to_reply_id", "reply_to_reply_id"),
+    Field("reply_comment_total", "reply_comment_total", 0),
+    Field("reply_id", "reply_id"),
+    Field("cid", "cid"),
+    *account_fields("user"),
+)
+USER = Schema(
+    Field("avatar", f"avatar_larger.url_list[{AVATAR_LARGER_INDEX}]"),
+    Field("city", "city"),
+    Field("country", "country"),
+    Field("district", "district"),
+    Field("favoriting_count", "favoriting_count", -1),
+    Field("follower_count", "follower_count", -1),
+    Field("max_follower_count", "max_follower_count", -1),
+    Field("following_count", "following_count", -1),
+    Field("total_favorited", "total_favorited", -1),
+    Field("gender", "gender", transform=to_gender),
+    Field("ip_location", "ip_location"),
+    Field("nickname", "nickname"),
+    Field("province", "province"),
+    Field("school_name", "school_name"),
+    Field("sec_uid", "sec_uid"),
+    Field("signature", "signature"),
+    Field("uid", "uid"),
+    Field("unique_id", "unique_id"),
+    Field("user_age", "user_age", -1),
+    Field("cover", f"cover_url[{AUTHOR_COVER_URL_INDEX}].url_list[{AUTHOR_COVER_INDEX}]"),
+    Field("short_id", "short_id"),
+    Field("aweme_count", "aweme_count", -1),
+    Field("verify", "custom_verify", "无"),
+    Field("enterprise", "enterprise_verify_reason", "无"),
+)
+LIVE = Schema(
+    Field("status", "status"),
+    Field("nickname", "owner.nickname"),
+    Field("title", "title"),
+    Field("flv_pull_url", "stream_url.flv_pull_url", None, to_mapping),
+    Field("hls_pull_url_map", "stream_url.hls_pull_url_map", None, to_mapping),
+    Field("cover", f"cover.url_list[{LIVE_COVER_INDEX}]"),
+    Field("total_user_str", "stats.total_user_str"),
+    Field("user_count_str", "stats.user_count_str"),
+)
+LIVE_TIKTOK = Schema(
+    Field("create_time", "create_time", transform=to_datetime),
+    Field("id_str", "id_str"),
+    Field("like_count", "like_count"),
+    Field("nickname", "owner.nickname"),
+    Field("display_id", "owner.display_id"),
+    Field("title", "title"),
+    Field("user_count", "user_count"),
+    Field("flv_pull_url", "stream_url.flv_pull_url", None, to_mapping),
+    Field("message", "message"),
+    Field("prompts", "prompts"),
+)
+SEARCH_USER = Schema(
+    Field("avatar", f"avatar_thumb.url_list[{SEARCH_AVATAR_INDEX}]"),
+    Field("nickname", "nickname"),
+    Field("sec_uid", "sec_uid"),
+    Field("signature", "signature"),
+    Field("uid", "uid"),
+    Field("short_id", "short_id"),
+    Field("verify", "custom_verify", "无"),
+    Field("enterprise", "enterprise_verify_reason", "无"),
+    Field("follower_count", "follower_count", -1),
+    Field("total_favorited", "total_favorited", -1),
+    Field("unique_id", "unique_id"),
+)
+SEARCH_LIVE = Schema(
+    Field("avatar", f"author.avatar_larger.url_list[{SEARCH_AVATAR_INDEX}]"),
+    Field("nickname", "author.nickname"),
+    Field("sec_uid", "author.sec_uid"),
+    Field("signature", "author.signature"),
+    Field("uid", "author.uid"),
+    Field("short_id", "author.short_id"),
+    Field("verify", "author.custom_verify", "无"),
+    Field("enterprise", "author.enterprise_verify_reason", "无"),
+    Field("room_id", "aweme_id"),
+)
+HOT = Schema(
+    Field("position", "position", -1, str),
+    Field("sentence_id", "sentence_id"),
+    Field("word", "word"),
+    Field("video_count", "video_count", -1, str),
+    Field("event_time", "event_time", transform="date"),
+    Field("view_count", "view_count", -1, str),
+    Field("hot_value", "hot_value", -1, str),
+    Field("cover", f"word_cover.url_list[{HOT_WORD_COVER_INDEX}]"),
+)
+COLLECTION_MUSIC = Schema(
+    Field("id", "id_str"),
+    Field("title", "title"),
+    Field("author", "author"),
+    Field("album", "album"),
+    Field("cover", f"cover_hd.url_list[{MUSIC_COLLECTION_COVER_INDEX}]"),
+    Field("download", f"play_url.url_list[{MUSIC_COLLECTION_DOWNLOAD_INDEX}]"),
+    Field("duration", "duration", 0, "duration"),
+)
+
+# 按平台与数据类型索引提取规则
+SCHEMAS = {
+    ("douyin", "detail"): DETAIL,
+    ("tiktok", "detail"): DETAIL_TIKTOK,
+    ("douyin", "comment"): COMMENT,
+    ("douyin", "user"): USER,
+    ("douyin", "live"): LIVE,
+    ("tiktok", "live"): LIVE_TIKTOK,
+    ("douyin", "search_user"): SEARCH_USER,
+    ("douyin", "search_live"): SEARCH_LIVE,
+    ("douyin", "hot"): HOT,
+    ("douyin", "music"): COLLECTION_MUSIC,
+}
@@ -145,6 +145,7 @@ class Comment(API):
             self.pages -= 1
             if callback:
                 await callback()
+            await self.handle_page()
 
     async def run_reply(self, ):
         if not self.reply:
@@ -1,4 +1,10 @@
+from asyncio import Queue
+from asyncio import create_task
+from asyncio import current_task
+from asyncio import gather
+from contextlib import nullcontext
 from time import time
+from typing import AsyncGenerator
 from typing import Callable
 from typing import Coroutine
 from typing import TYPE_CHECKING
@@ -15,9 +21,9 @@ from rich.progress import (
     TimeElapsedColumn,
 )
 
+from ..custom import PIPELINE_SIZE
 from ..custom import PROGRESS
 from ..custom import USERAGENT
-from ..custom import wait
 from ..tools import PrivateRetry
 from ..tools import TikTokDownloaderError
 from ..tools import capture_error_request
@@ -72,6 +78,8 @@ class API:
             cookie: str | dict = None,
             proxy: str = None,
             *args,
+            progress: Progress = None,
+            page_callback: Callable = None,
             **kwargs):
         self.headers = params.headers.copy()
         self.log = params.logger
@@ -84,11 +92,18 @@ class API:
         self.timeout = params.timeout
         self.cookie = cookie or params.cookie
         self.client: AsyncClient = params.client
+        self.archive = params.archive
+        self.limiter = params.limiter
+        self.interval = ""
         self.pages = 99999
         self.cursor = 0
         self.response = []
         self.finished = False
         self.text = ""
+        # 传入 page_callback 时，每获取一页数据就交由回调函数处理并清空 response
+        self.page_callback = page_callback
+        self.shared_progress = progress
+        self.total = 0
         self.set_temp_cookie(cookie)
 
     def set_temp_cookie(self, cookie: str = None):
@@ -148,6 +163,33 @@ class API:
                 raise TikTokDownloaderError
         return self.response
 
+    async def iter_run(self, *args, **kwargs, ) -> AsyncGenerator[list[dict], None]:
+        """在后台获取数据并逐页返回，已返回的数据不再保留；参数与 run 相同"""
+        pages = Queue(PIPELINE_SIZE)
+        self.page_callback = pages.put
+
+        async def produce():
+            try:
+                await self.run(*args, **kwargs)
+                if self.response:
+                    self.total += len(self.response)
+                    await pages.put(self.response)
+                    self.response = []
+            finally:
+                # 消费者停止读取时会取消生产者，此时队列可能已满，不再发送结束标记
+                if not current_task().cancelling():
+                    await pages.put(None)
+
+        task = create_task(produce())
+        try:
+            while (page := await pages.get()) is not None:
+                yield page
+            await task
+        finally:
+            if not task.done():
+                task.cancel()
+                await gather(task, return_exceptions=True, )
+
     async def run_single(
             self,
             data_key: str,
@@ -169,6 +211,7 @@ class API:
                 headers=headers,
                 finished=True,
         ):
+            self.pace(data, data_key, has_more, headers, )
             self.check_response(
                 data,
                 data_key,
@@ -193,7 +236,7 @@ class API:
             callback: Type[Coroutine] = None,
             *args,
             **kwargs, ):
-        with self.progress_object() as progress:
+        with self.__progress_context() as progress:
             task_id = progress.add_task(
                 _("正在获取{text}数据").format(text=self.text),
                 total=None,
@@ -215,6 +258,18 @@ class API:
                 self.pages -= 1
                 if callback:
                     await callback()
+                await self.handle_page()
+            progress.remove_task(task_id)
+
+    def __progress_context(self):
+        """使用外部传入的进度条时，由外部负责启动和关闭"""
+        return nullcontext(self.shared_progress) if self.shared_progress else self.progress_object()
+
+    async def handle_page(self):
+        if self.page_callback and self.response:
+            self.total += len(self.response)
+            page, self.response = self.response, []
+            await self.page_callback(page)
 
     def check_response(
             self,
@@ -238,6 +293,44 @@ class API:
             self.log.error(_("数据解析失败，请告知作者处理: {data}").format(data=data_dict))
             self.finished = True
 
+    def pace(
+            self,
+            data_dict: dict,
+            data_key: str = "",
+            has_more="has_more",
+            headers: dict = None,
+    ) -> None:
+        """分页数据为空但仍有下一页时视为触发风控，降低当前接口的请求频率；
+        响应状态由 __return_response 统一记录"""
+        if self.__empty(data_dict, data_key, has_more):
+            self.__throttle(self.api, self.__identity(headers or self.headers), )
+
+    @staticmethod
+    def __blocked(data_dict: dict, ) -> bool:
+        """接口返回错误状态码时视为触发风控"""
+        return isinstance(data_dict, dict) and data_dict.get(
+            "status_code", data_dict.get("statusCode")) not in (None, 0, "0")
+
+    @staticmethod
+    def __empty(data_dict: dict, data_key: str, has_more: str, ) -> bool:
+        if not (data_key and isinstance(data_dict, dict)):
+            return False
+        if data_key not in data_dict:
+            return True
+        return not data_dict[data_key] and bool(data_dict.get(has_more))
+
+    def __success(self, url: str, identity: str, ) -> None:
+        interval = f"{self.limiter.success(url, identity, ):.1f}"
+        # 请求间隔变化时才输出，避免每次请求都刷屏
+        if interval != self.interval:
+            self.interval = interval
+            self.log.info(_("当前请求间隔：{interval} 秒").format(interval=interval))
+
+    def __throttle(self, url: str, identity: str, ) -> None:
+        self.interval = f"{self.limiter.throttle(url, identity, ):.1f}"
+        self.log.warning(
+            _("请求疑似触发风控，已降低请求频率，当前请求间隔：{interval} 秒").format(interval=self.interval))
+
     def set_referer(self, url: str = None) -> None:
         self.headers["Referer"] = url or self.referer
 
@@ -253,21 +346,21 @@ class API:
             *args,
             **kwargs,
     ):
-        params = self.deal_url_params(params, encryption, )
+        query = self.deal_url_params(params, encryption, )
         match method:
             case "GET":
-                return await self.__request_data_get(
+                response = await self.__request_data_get(
                     url,
-                    params,
+                    query,
                     headers or self.headers,
                     finished=finished,
                     *args,
                     **kwargs,
                 )
             case "POST":
-                return await self.__request_data_post(
+                response = await self.__request_data_post(
                     url,
-                    params,
+                    query,
                     data,
                     headers or self.headers,
                     finished=finished,
@@ -276,6 +369,9 @@ class API:
                 )
             case _:
                 raise TikTokDownloaderError
+        if response and self.archive:
+            await self.archive.write(url, params, response, )
+        return response
 
     @PrivateRetry.retry
     @capture_error_request
@@ -295,6 +391,7 @@ class API:
             headers,
             **kwargs,
         )
+        await self.limiter.acquire(url, self.__identity(headers), )
         response = await self.client.get(
             f"{url}?{params}",
             headers=headers,
@@ -320,6 +417,7 @@ class API:
             headers,
             **kwargs,
         )
+        await self.limiter.acquire(url, self.__identity(headers), )
         response = await self.client.post(
             f"{url}?{params}",
             data=data,
@@ -334,12 +432,22 @@ class API:
         self.log.info(f"Response Headers: {dict(response.headers)}", False)
         # 记录请求体数据会导致日志文件体积过大，仅在必要时记录
         # self.log.info(f"Response Content: {response.content}", False)
+        url, identity = str(response.request.url), self.__identity(response.request.headers)
+        if response.status_code in {403, 429} or (response.is_success and not response.content):
+            self.__throttle(url, identity, )
         response.raise_for_status()
-        await wait()
         # if response.status_code != 200:
         #     self.log.error(f"请求 {url} 失败，响应码 {response.status_code}")
         #     return
-        return response.json()
+        data = response.json()
+        if self.__blocked(data):
+            self.__throttle(url, identity, )
+        else:
+            self.__success(url, identity, )
+        return data
+
+    def __identity(self, headers: dict, ) -> str:
+        return self.limiter.identity(headers.get("Cookie", ""), self.proxy, )
 
     def __record_request_messages(
             self,
@@ -365,7 +473,7 @@ class API:
         return ""
 
     def summary_works(self, ) -> None:
-        self.log.info(_("共获取到 {count} 个{text}").format(count=len(self.response), text=self.text))
+        self.log.info(_("共获取到 {count} 个{text}").format(count=self.total + len(self.response), text=self.text))
 
     def progress_object(self):
         return Progress(
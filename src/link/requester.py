@@ -1,8 +1,10 @@
+from asyncio import Semaphore
+from asyncio import gather
 from re import compile
 from typing import TYPE_CHECKING
 
 # from ..custom import PHONE_HEADERS
-from ..custom import wait
+from ..custom import RESOLVE_WORKERS
 from ..tools import PrivateRetry
 from ..tools import TikTokDownloaderError
 from ..tools import capture_error_request
@@ -21,21 +23,33 @@ class Requester:
         self.client = client
         self.log = params.logger
         self.max_retry = params.max_retry
+        self.limiter = params.limiter
+        self.redirect = params.redirect
 
     async def run(self, text: str, ) -> str:
-        urls = self.URL.finditer(text)
-        if not urls:
+        """并发解析文本中的全部链接，优先使用重定向缓存，结果保持链接原有顺序"""
+        if not (urls := [i.group() for i in self.URL.finditer(text)]):
             return ""
-        result = []
-        for i in urls:
-            result.append(await self.request_url(u := i.group(), ) or u)
-            await wait()
-        return " ".join(i for i in result if i)
+        unique = list(dict.fromkeys(urls))
+        cache = await self.redirect.read(unique) if self.redirect else {}
+        workers = Semaphore(RESOLVE_WORKERS)
+
+        async def resolve(url: str) -> str:
+            async with workers:
+                return await self.request_url(url, )
+
+        pending = [i for i in unique if i not in cache]
+        resolved = {k: v for k, v in zip(pending, await gather(*(resolve(i) for i in pending))) if v}
+        if self.redirect:
+            await self.redirect.write(resolved)
+        result = cache | resolved
+        return " ".join(result.get(i) or i for i in urls)
 
     @PrivateRetry.retry
     @capture_error_request
     async def request_url(self, url: str, content="url", ):
         self.log.info(f"URL: {url}", False)
+        await self.limiter.acquire(url, )
         if content in {"url", "headers"}:
             response = await self.request_url_head(url)
         else:
@@ -1,5 +1,9 @@
+from .archive import ResponseArchive
+from .blob import BlobStore
 from .cache import Cache
 from .database import Database
 from .recorder import DownloadRecorder
+from .redirect import RedirectCache
+from .task import DownloadQueue
 
-__all__ = ["Cache", "DownloadRecorder", "Database", ]
+__all__ = ["Cache", "DownloadRecorder", "Database", "DownloadQueue", "BlobStore", "ResponseArchive", "RedirectCache", ]
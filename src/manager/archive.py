@@ -0,0 +1,203 @@
+from asyncio import Lock
+from asyncio import to_thread
+from datetime import datetime
+from gzip import compress as gzip_compress
+from gzip import decompress as gzip_decompress
+from json import dumps
+from json import loads
+from pathlib import Path
+from re import sub
+from time import time
+from typing import AsyncGenerator
+from typing import Callable
+from typing import TYPE_CHECKING
+from urllib.parse import urlparse
+
+try:
+    from zstandard import ZstdCompressor
+    from zstandard import ZstdDecompressor
+except ImportError:  # 未安装 zstandard 时使用 gzip 压缩
+    ZstdCompressor = ZstdDecompressor = None
+
+from ..custom import PROJECT_ROOT
+from ..custom import RESPONSE_ARCHIVE
+from ..extract.accessor import compile_path
+from ..translation import _
+
+if TYPE_CHECKING:
+    from .database import Database
+
+__all__ = ["ResponseArchive"]
+
+
+class ResponseArchive:
+    """接口原始响应数据归档，每页响应数据压缩为独立数据块追加至 JSONL 分段文件，索引记录于数据库；
+    归档数据可在不请求接口的情况下重新提取"""
+    __FOLDER = "Archive"
+    # 单个分段文件的最大体积，单位：字节
+    __SEGMENT = 1024 * 1024 * 256
+    # 重新提取时合并为一批处理的最大数据数量，每批数据在同一事务中储存
+    REPLAY_BATCH = 1000
+    # 作为归档数据 ID 的请求参数，按优先级排列
+    __ID_KEYS = (
+        "comment_id",
+        "aweme_id",
+        "itemId",
+        "item_id",
+        "mix_id",
+        "mixId",
+        "collects_id",
+        "sec_user_id",
+        "secUid",
+        "uniqueId",
+        "room_id",
+        "web_rid",
+        "keyword",
+    )
+    # 支持重新提取的接口，按平台区分，值为 (数据所在的属性链, 提取数据类型)；
+    # 仅包含提取器支持的平台与数据类型，评论与账号数据暂仅支持抖音平台
+    # 提取器没有合集数据类型，合集作品列表按作品数据重新提取
+    REPLAY = {
+        False: {
+            "/aweme/v1/web/aweme/post/": ("aweme_list", "detail"),
+            "/aweme/v1/web/aweme/favorite/": ("aweme_list", "detail"),
+            "/aweme/v1/web/aweme/listcollection/": ("aweme_list", "detail"),
+            "/aweme/v1/web/collects/video/list/": ("aweme_list", "detail"),
+            "/aweme/v1/web/mix/aweme/": ("aweme_list", "detail"),
+            "/aweme/v1/web/aweme/detail/": ("aweme_detail", "detail"),
+            "/aweme/v1/web/comment/list/": ("comments", "comment"),
+            "/aweme/v1/web/comment/list/reply/": ("comments", "comment"),
+            "/aweme/v1/web/user/profile/other/": ("user", "user"),
+        },
+        True: {
+            "/api/post/item_list/": ("itemList", "detail"),
+            "/api/favorite/item_list/": ("itemList", "detail"),
+            "/api/mix/item_list/": ("itemList", "detail"),
+            "/api/item/detail/": ("itemInfo.itemStruct", "detail"),
+        },
+    }
+
+    def __init__(self, database: "Database", switch: bool = RESPONSE_ARCHIVE, ):
+        self.database = database
+        self.switch = switch
+        self.root = PROJECT_ROOT.joinpath(self.__FOLDER)
+        self.suffix = ".jsonl.zst" if ZstdCompressor else ".jsonl.gz"
+        self.segment: Path | None = None
+        self.lock = Lock()
+
+    @staticmethod
+    def endpoint(url: str) -> tuple[str, str]:
+        """返回接口主机与路径"""
+        url = urlparse(url)
+        return url.netloc, sub(r"/+", "/", url.path)
+
+    def __extract_id(self, params: dict | None, ) -> str:
+        if not params:
+            return ""
+        for key in self.__ID_KEYS:
+            if value := params.get(key):
+                return str(value)
+        return ""
+
+    async def write(self, url: str, params: dict | None, data: dict | list, ) -> None:
+        """归档一页接口响应数据"""
+        if not self.switch:
+            return
+        host, path = self.endpoint(url)
+        record = {
+            "host": host,
+            "endpoint": path,
+            "id": self.__extract_id(params),
+            "time": int(time()),
+            "data": data,
+        }
+        async with self.lock:
+            segment, offset, size = await to_thread(self.__append, record, )
+        await self.database.write_archive_data(
+            (segment, offset, size, host, path, record["id"], record["time"],))
+
+    def __append(self, record: dict, ) -> tuple[str, int, int]:
+        block = self.__compress(dumps(record, ensure_ascii=False, separators=(",", ":"), ).encode() + b"\n")
+        if not self.segment or self.segment.stat().st_size >= self.__SEGMENT:
+            self.root.mkdir(exist_ok=True)
+            self.segment = self.root.joinpath(f"{datetime.now():%Y%m%d%H%M%S%f}{self.suffix}")
+            self.segment.touch()
+        with self.segment.open("ab") as f:
+            offset = f.tell()
+            f.write(block)
+        return self.segment.name, offset, len(block)
+
+    @staticmethod
+    def __compress(data: bytes, ) -> bytes:
+        if ZstdCompressor:
+            return ZstdCompressor().compress(data)
+        return gzip_compress(data, compresslevel=6, )
+
+    @staticmethod
+    def __decompress(segment: str, data: bytes, ) -> bytes:
+        if segment.endswith(".zst"):
+            if not ZstdDecompressor:
+                raise RuntimeError(_("读取归档文件 {segment} 需要安装 zstandard 库").format(segment=segment))
+            return ZstdDecompressor().decompress(data)
+        return gzip_decompress(data)
+
+    async def read(
+            self,
+            host: str = None,
+            endpoint: str = None,
+            id_: str = None,
+            since: int = None,
+    ) -> AsyncGenerator[dict, None]:
+        """按写入顺序读取归档数据，可按接口主机、接口路径、ID、归档时间筛选"""
+        async for rows in self.database.read_archive_data(host, endpoint, id_, since, ):
+            for record in await to_thread(self.__read_records, rows, ):
+                yield record
+
+    def __read_records(self, rows: list[tuple[str, int, int]], ) -> list[dict]:
+        records = []
+        handle, current = None, None
+        try:
+            for segment, offset, size in rows:
+                if segment != current:
+                    if handle:
+                        handle.close()
+                    if not (path := self.root.joinpath(segment)).is_file():
+                        handle, current = None, None
+                        continue
+                    handle, current = path.open("rb"), segment
+                handle.seek(offset)
+                records.append(loads(self.__decompress(segment, handle.read(size))))
+        finally:
+            if handle:
+                handle.close()
+        return records
+
+    async def replay(
+            self,
+            host: str = None,
+            endpoint: str = None,
+            id_: str = None,
+            since: int = None,
+            warning: Callable[[str], None] = None,
+    ) -> AsyncGenerator[tuple[str, bool, list[dict]], None]:
+        """读取支持重新提取的归档数据，返回 (提取数据类型, 是否为 TikTok 数据, 数据列表)；
+        同类数据合并为不超过 REPLAY_BATCH 条的批次，筛选参数与 read 相同；
+        不支持重新提取的接口数据被跳过，每个接口调用一次 warning"""
+        batches: dict[tuple[str, bool], list[dict]] = {}
+        skipped = set()
+        async for record in self.read(host, endpoint, id_, since, ):
+            tiktok = "tiktok" in record["host"]
+            if not (rule := self.REPLAY[tiktok].get(record["endpoint"])):
+                if warning and (key := (record["host"], record["endpoint"])) not in skipped:
+                    skipped.add(key)
+                    warning(_("归档接口 {url} 的数据暂不支持重新提取，已跳过").format(url="".join(key)))
+                continue
+            if not (data := compile_path(rule[0])(record["data"], None)):
+                continue
+            key = (rule[1], tiktok)
+            batch = batches.setdefault(key, [])
+            batch.extend(data if isinstance(data, list) else [data])
+            if len(batch) >= self.REPLAY_BATCH:
+                yield *key, batches.pop(key)
+        for key, batch in batches.items():
+            yield *key, batch
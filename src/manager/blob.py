@@ -0,0 +1,90 @@
+from asyncio import to_thread
+from hashlib import sha256
+from os import link
+from pathlib import Path
+from shutil import copyfile
+from typing import TYPE_CHECKING
+
+from ..custom import BLOB_STORE
+from ..custom import PROJECT_ROOT
+
+if TYPE_CHECKING:
+    from .database import Database
+
+__all__ = ["BlobStore"]
+
+
+class BlobStore:
+    """按内容去重的文件存储，相同内容的文件仅保存一份，下载目录中的文件为指向该文件的硬链接"""
+    __FOLDER = "Blob"
+    __BLOCK = 1024 * 1024
+
+    def __init__(self, database: "Database", switch: bool = BLOB_STORE, ):
+        self.database = database
+        self.switch = switch
+        self.root = PROJECT_ROOT.joinpath(self.__FOLDER)
+        self.pruned = False
+
+    async def link(self, key: str, actual: Path, ) -> Path | None:
+        """如果存在相同资源的文件，在目标路径创建文件链接并返回文件路径"""
+        if not (self.switch and key):
+            return None
+        await self.__prune()
+        if not (data := await self.database.read_blob_key(key)):
+            return None
+        blob = Path(data["PATH"])
+        if not blob.is_file():
+            await self.database.delete_blob_data(data["HASH"])
+            return None
+        target = actual.with_suffix(blob.suffix)
+        if not target.exists():
+            self.__link(blob, target, )
+            await self.database.update_blob_count(data["HASH"], 1, )
+        return target
+
+    async def store(self, key: str, file: Path, ) -> None:
+        """计算文件内容哈希值，相同内容的文件替换为文件链接，否则将文件加入存储"""
+        if not (self.switch and key and file.is_file()):
+            return
+        hash_ = await to_thread(self.__hash, file, )
+        blob = self.root.joinpath(hash_[:2], f"{hash_}{file.suffix}")
+        if blob.is_file():
+            file.unlink()
+            self.__link(blob, file, )
+        else:
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                link(file, blob)
+            except OSError:
+                # 文件系统不支持硬链接时不加入存储，避免重复占用磁盘空间
+                return
+        await self.database.write_blob_data(key, hash_, str(blob), blob.stat().st_size, )
+
+    async def __prune(self):
+        """首次使用时清理不再被任何下载文件引用的文件，并根据硬链接数量同步引用计数"""
+        if self.pruned:
+            return
+        self.pruned = True
+        for hash_, path in await self.database.read_blob_data():
+            if not (blob := Path(path)).is_file():
+                await self.database.delete_blob_data(hash_)
+            elif (count := blob.stat().st_nlink - 1) <= 0:
+                blob.unlink()
+                await self.database.delete_blob_data(hash_)
+            else:
+                await self.database.update_blob_count(hash_, count, True, )
+
+    @staticmethod
+    def __link(blob: Path, target: Path, ):
+        try:
+            link(blob, target)
+        except OSError:
+            copyfile(blob, target)
+
+    @classmethod
+    def __hash(cls, file: Path, ) -> str:
+        hash_ = sha256()
+        with file.open("rb") as f:
+            while block := f.read(cls.__BLOCK):
+                hash_.update(block)
+        return hash_.hexdigest()
@@ -1,4 +1,7 @@
 from asyncio import CancelledError
+from asyncio import Lock
+from asyncio import create_task
+from asyncio import sleep
 from contextlib import suppress
 
 from aiosqlite import Row
@@ -11,15 +14,28 @@ __all__ = ["Database"]
 
 class Database:
     __FILE = "TikTokDownloader.db"
+    # 批量查询时单条 SQL 语句的最大参数数量，需要小于 SQLite 参数数量限制
+    __CHUNK = 500
+    # 下载记录缓冲区达到该数量时立即写入数据库
+    __FLUSH_SIZE = 64
+    # 下载记录缓冲区的最长等待时间，单位：秒
+    __FLUSH_INTERVAL = 1
 
     def __init__(self, ):
         self.file = PROJECT_ROOT.joinpath(self.__FILE)
         self.database = None
         self.cursor = None
+        self.__buffer: dict[str, None] = {}
+        self.__task_buffer: dict[str, int | None] = {}  # 下载任务状态缓冲区，值为 None 代表删除任务
+        self.__flush_task = None
+        self.__flush_lock = Lock()  # 写入下载记录与删除下载记录互斥，避免已删除的记录被重新写入
 
     async def __connect_database(self):
         self.database = await connect(self.file)
         self.database.row_factory = Row
+        # WAL 模式下提交无需每次同步写入磁盘，程序异常退出也不会损坏数据库
+        await self.database.execute("PRAGMA journal_mode=WAL;")
+        await self.database.execute("PRAGMA synchronous=NORMAL;")
         self.cursor = await self.database.cursor()
         await self.__create_table()
         await self.__write_default_config()
@@ -42,6 +58,45 @@ class Database:
         NAME TEXT PRIMARY KEY,
         VALUE TEXT NOT NULL
         );""")
+        await self.database.execute("""CREATE TABLE IF NOT EXISTS download_task (
+        TEMP TEXT PRIMARY KEY,
+        URL TEXT NOT NULL,
+        ACTUAL TEXT NOT NULL,
+        SHOW TEXT NOT NULL,
+        ID TEXT NOT NULL,
+        SUFFIX TEXT NOT NULL,
+        TIKTOK INTEGER NOT NULL DEFAULT 0,
+        STATE INTEGER NOT NULL DEFAULT 0,
+        KEY TEXT NOT NULL DEFAULT ''
+        );""")
+        await self.database.execute("""CREATE TABLE IF NOT EXISTS blob_data (
+        HASH TEXT PRIMARY KEY,
+        PATH TEXT NOT NULL,
+        SIZE INTEGER NOT NULL,
+        COUNT INTEGER NOT NULL DEFAULT 0
+        );""")
+        await self.database.execute("""CREATE TABLE IF NOT EXISTS blob_key (
+        KEY TEXT PRIMARY KEY,
+        HASH TEXT NOT NULL
+        );""")
+        await self.database.execute("""CREATE TABLE IF NOT EXISTS archive_data (
+        SEGMENT TEXT NOT NULL,
+        OFFSET INTEGER NOT NULL,
+        SIZE INTEGER NOT NULL,
+        HOST TEXT NOT NULL,
+        ENDPOINT TEXT NOT NULL,
+        ID TEXT NOT NULL,
+        TIME INTEGER NOT NULL,
+        PRIMARY KEY (SEGMENT, OFFSET)
+        );""")
+        await self.database.execute(
+            "CREATE INDEX IF NOT EXISTS archive_data_ENDPOINT ON archive_data (ENDPOINT, ID);")
+        await self.database.execute("CREATE INDEX IF NOT EXISTS archive_data_TIME ON archive_data (TIME);")
+        await self.database.execute("""CREATE TABLE IF NOT EXISTS redirect_data (
+        URL TEXT PRIMARY KEY,
+        TARGET TEXT NOT NULL,
+        TIME INTEGER NOT NULL
+        );""")
 
     async def __write_default_config(self):
         await self.database.execute("""INSERT OR IGNORE INTO config_data (NAME, VALUE)
@@ -77,28 +132,189 @@ class Database:
         await self.cursor.execute("SELECT NAME, MARK FROM mapping_data WHERE ID=?", (id_,))
         return await self.cursor.fetchone()
 
-    async def has_download_data(self, id_: str) -> bool:
-        await self.cursor.execute("SELECT ID FROM download_data WHERE ID=?", (id_,))
-        return bool(await self.cursor.fetchone())
+    async def read_download_data(self, ):
+        """分批读取全部下载记录"""
+        await self.flush_download_data()
+        async with self.database.execute("SELECT ID FROM download_data") as cursor:
+            while rows := await cursor.fetchmany(self.__CHUNK * 20):
+                yield [row[0] for row in rows]
 
     async def write_download_data(self, id_: str):
-        await self.database.execute(
-            "INSERT OR IGNORE INTO download_data (ID) VALUES (?);", (id_,))
-        await self.database.commit()
+        """下载记录先写入缓冲区，达到数量或等待时间后在同一事务中批量写入"""
+        self.__buffer[id_] = None
+        if len(self.__buffer) >= self.__FLUSH_SIZE:
+            await self.flush_download_data()
+        else:
+            self.__schedule_flush()
+
+    def __schedule_flush(self):
+        if not self.__flush_task:
+            self.__flush_task = create_task(self.__delay_flush())
+
+    async def __flush_all(self):
+        while self.__buffer or self.__task_buffer:
+            await self.flush_download_data()
+            await self.flush_task_data()
+
+    async def __delay_flush(self):
+        """写入期间新增的数据在同一次写入中处理，写入完成后才清除任务引用"""
+        await sleep(self.__FLUSH_INTERVAL)
+        await self.__flush_all()
+        self.__flush_task = None
+
+    async def __cancel_flush(self):
+        """等待正在进行的写入完成后结束延迟写入任务"""
+        if not (task := self.__flush_task):
+            return
+        await self.__flush_all()
+        task.cancel()
+        with suppress(CancelledError):
+            await task
+        self.__flush_task = None
+
+    async def flush_download_data(self):
+        """下载记录提交后才从缓冲区移除，写入期间仍可查询"""
+        async with self.__flush_lock:
+            while self.__buffer:
+                ids = list(self.__buffer)
+                await self.database.executemany(
+                    "INSERT OR IGNORE INTO download_data (ID) VALUES (?);", ((i,) for i in ids))
+                await self.database.commit()
+                for i in ids:
+                    self.__buffer.pop(i, None)
 
     async def delete_download_data(self, ids: list | tuple | str):
         if not ids:
             return
         if isinstance(ids, str):
             ids = [ids]
-        [await self.__delete_download_data(i) for i in ids]
+        async with self.__flush_lock:
+            for i in ids:
+                self.__buffer.pop(i, None)
+            await self.database.executemany("DELETE FROM download_data WHERE ID=?", ((i,) for i in ids))
+            await self.database.commit()
+
+    async def delete_all_download_data(self):
+        async with self.__flush_lock:
+            self.__buffer.clear()
+            await self.database.execute("DELETE FROM download_data")
+            await self.database.commit()
+
+    async def write_task_data(self, tasks: list[tuple]):
+        async with self.__flush_lock:
+            # 新增任务覆盖缓冲区中同一任务的旧状态
+            for i in tasks:
+                self.__task_buffer.pop(i[1], None)
+            await self.database.executemany(
+                """REPLACE INTO download_task (URL, TEMP, ACTUAL, SHOW, ID, SUFFIX, KEY, TIKTOK, STATE)
+                VALUES (?,?,?,?,?,?,?,?,?)""",
+                tasks,
+            )
+            await self.database.commit()
+
+    async def update_task_state(self, temp: str, state: int | None, ):
+        """任务状态先写入缓冲区，达到数量或等待时间后在同一事务中批量写入；state 为 None 代表删除任务"""
+        self.__task_buffer[temp] = state
+        if len(self.__task_buffer) >= self.__FLUSH_SIZE:
+            await self.flush_task_data()
+        else:
+            self.__schedule_flush()
+
+    async def flush_task_data(self):
+        async with self.__flush_lock:
+            while self.__task_buffer:
+                tasks, self.__task_buffer = self.__task_buffer, {}
+                await self.database.executemany(
+                    "DELETE FROM download_task WHERE TEMP=?",
+                    ((k,) for k, v in tasks.items() if v is None),
+                )
+                await self.database.executemany(
+                    "UPDATE download_task SET STATE=? WHERE TEMP=?",
+                    ((v, k) for k, v in tasks.items() if v is not None),
+                )
+                await self.database.commit()
+
+    async def read_task_data(self, ):
+        await self.flush_task_data()
+        await self.cursor.execute("SELECT * FROM download_task")
+        return await self.cursor.fetchall()
+
+    async def read_blob_key(self, key: str, ):
+        await self.cursor.execute(
+            "SELECT blob_data.HASH, PATH FROM blob_key JOIN blob_data ON blob_key.HASH=blob_data.HASH WHERE KEY=?",
+            (key,),
+        )
+        return await self.cursor.fetchone()
+
+    async def read_blob_data(self, ) -> list[tuple[str, str]]:
+        await self.cursor.execute("SELECT HASH, PATH FROM blob_data")
+        return [(i["HASH"], i["PATH"]) for i in await self.cursor.fetchall()]
+
+    async def write_blob_data(self, key: str, hash_: str, path: str, size: int, ):
+        await self.database.execute(
+            "INSERT OR IGNORE INTO blob_data (HASH, PATH, SIZE) VALUES (?,?,?)", (hash_, path, size))
+        await self.database.execute("REPLACE INTO blob_key (KEY, HASH) VALUES (?,?)", (key, hash_))
+        await self.database.execute("UPDATE blob_data SET COUNT=COUNT+1 WHERE HASH=?", (hash_,))
         await self.database.commit()
 
-    async def __delete_download_data(self, id_: str):
-        await self.database.execute("DELETE FROM download_data WHERE ID=?", (id_,))
+    async def update_blob_count(self, hash_: str, count: int, reset=False, ):
+        if reset:
+            await self.database.execute("UPDATE blob_data SET COUNT=? WHERE HASH=?", (count, hash_))
+        else:
+            await self.database.execute("UPDATE blob_data SET COUNT=COUNT+? WHERE HASH=?", (count, hash_))
+        await self.database.commit()
 
-    async def delete_all_download_data(self):
-        await self.database.execute("DELETE FROM download_data")
+    async def delete_blob_data(self, hash_: str, ):
+        await self.database.execute("DELETE FROM blob_key WHERE HASH=?", (hash_,))
+        await self.database.execute("DELETE FROM blob_data WHERE HASH=?", (hash_,))
+        await self.database.commit()
+
+    async def write_archive_data(self, data: tuple, ):
+        await self.database.execute(
+            "INSERT OR REPLACE INTO archive_data (SEGMENT, OFFSET, SIZE, HOST, ENDPOINT, ID, TIME) VALUES (?,?,?,?,?,?,?)",
+            data,
+        )
+        await self.database.commit()
+
+    async def read_archive_data(self, host: str = None, endpoint: str = None, id_: str = None, since: int = None, ):
+        """按写入顺序分批读取归档数据索引，返回 (SEGMENT, OFFSET, SIZE) 列表"""
+        conditions, values = [], []
+        for column, value, operator in (
+                ("HOST", host, "="),
+                ("ENDPOINT", endpoint, "="),
+                ("ID", id_, "="),
+                ("TIME", since, ">="),
+        ):
+            if value is not None:
+                conditions.append(f"{column}{operator}?")
+                values.append(value)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        async with self.database.execute(
+                f"SELECT SEGMENT, OFFSET, SIZE FROM archive_data{where} ORDER BY TIME, SEGMENT, OFFSET",
+                values,
+        ) as cursor:
+            while rows := await cursor.fetchmany(self.__CHUNK):
+                yield [tuple(row) for row in rows]
+
+    async def read_redirect_data(self, urls: list[str], since: int, ) -> dict[str, str]:
+        """批量查询链接重定向缓存，仅返回 since 之后写入的缓存"""
+        urls = list(dict.fromkeys(urls))
+        result = {}
+        for i in range(0, len(urls), self.__CHUNK):
+            chunk = urls[i:i + self.__CHUNK]
+            async with self.database.execute(
+                    f"SELECT URL, TARGET FROM redirect_data WHERE TIME>=? AND URL IN ({','.join('?' * len(chunk))})",
+                    (since, *chunk),
+            ) as cursor:
+                result.update((row[0], row[1]) for row in await cursor.fetchall())
+        return result
+
+    async def write_redirect_data(self, data: list[tuple[str, str, int]], ):
+        await self.database.executemany("REPLACE INTO redirect_data (URL, TARGET, TIME) VALUES (?,?,?)", data)
+        await self.database.commit()
+
+    async def delete_redirect_data(self, before: int, ):
+        await self.database.execute("DELETE FROM redirect_data WHERE TIME<?", (before,))
         await self.database.commit()
 
     async def __aenter__(self):
@@ -106,6 +322,8 @@ class Database:
         return self
 
     async def close(self):
+        await self.__cancel_flush()
+        await self.__flush_all()
         with suppress(CancelledError):
             await self.cursor.close()
         await self.database.close()
@@ -1,3 +1,6 @@
+from array import array
+from asyncio import Lock
+from bisect import bisect_left
 from pathlib import Path
 from platform import system
 from re import compile
@@ -106,6 +109,71 @@ class __DownloadRecorder:
         return set()
 
 
+class DownloadIndex:
+    """下载记录内存索引，数字 ID 储存为有序 array 并使用二分查找，新增 ID 暂存于集合，数量较多时合并"""
+    __COMPACT = 1024 * 64
+
+    def __init__(self, ):
+        self.ids = array("Q")
+        self.added: set[int] = set()
+        self.others: set[str] = set()
+        self.unsorted = False  # 是否存在尚未排序的已载入 ID
+
+    @staticmethod
+    def __convert(id_: str) -> int | None:
+        if id_.isdigit() and (value := int(id_)) < 1 << 64:
+            return value
+        return None
+
+    def __contains__(self, id_: str) -> bool:
+        if (value := self.__convert(id_)) is None:
+            return id_ in self.others
+        if value in self.added:
+            return True
+        index = bisect_left(self.ids, value)
+        return index < len(self.ids) and self.ids[index] == value
+
+    def load(self, ids: list[str]):
+        """批量载入数据库中的下载记录，不排序；全部载入后需要调用 compact"""
+        for i in ids:
+            if (value := self.__convert(i)) is None:
+                self.others.add(i)
+            else:
+                self.ids.append(value)
+                self.unsorted = True
+
+    def add(self, id_: str, compact=True, ):
+        if (value := self.__convert(id_)) is None:
+            self.others.add(id_)
+        else:
+            self.added.add(value)
+            if compact and len(self.added) >= self.__COMPACT:
+                self.compact()
+
+    def remove(self, id_: str):
+        if (value := self.__convert(id_)) is None:
+            self.others.discard(id_)
+            return
+        self.added.discard(value)
+        index = bisect_left(self.ids, value)
+        if index < len(self.ids) and self.ids[index] == value:
+            self.ids.pop(index)
+
+    def compact(self):
+        if self.added or self.unsorted:
+            self.added.difference_update(self.ids)
+            self.ids.extend(self.added)
+            self.ids = array("Q", sorted(self.ids))
+            self.added.clear()
+            self.unsorted = False
+
+    def clear(self):
+        self.ids = array("Q")
+        self.unsorted = False
+        self.added.clear()
+        self.others.clear()
+
+
 class DownloadRecorder:
     detail = compile(r"\d{19}")
 
@@ -116,23 +184,67 @@ class DownloadRecorder:
         self.switch = switch
         self.console = console
         self.database = database
+        self.index = None
+        self.lock = Lock()
+        self.pending: list[tuple[str, str]] | None = None  # 载入索引期间的下载记录变更
+
+    async def __get_index(self) -> DownloadIndex:
+        """首次查询时从数据库载入全部下载记录，载入完成后再应用载入期间的下载记录变更"""
+        if self.index is None:
+            async with self.lock:
+                if self.index is None:
+                    self.pending = []
+                    index = DownloadIndex()
+                    async for ids in self.database.read_download_data():
+                        index.load(ids)
+                    index.compact()
+                    for action, id_ in self.pending:
+                        self.__apply(index, action, id_, )
+                    self.index, self.pending = index, None
+        return self.index
+
+    def __update_index(self, action: str, id_: str = "", ):
+        if self.index is not None:
+            self.__apply(self.index, action, id_, )
+        elif self.pending is not None:
+            self.pending.append((action, id_))
+
+    @staticmethod
+    def __apply(index: DownloadIndex, action: str, id_: str, ):
+        match action:
+            case "add":
+                index.add(id_)
+            case "remove":
+                index.remove(id_)
+            case "clear":
+                index.clear()
 
     async def has_id(self, id_: str) -> bool:
-        return await self.database.has_download_data(id_) if self.switch and id_ else False
+        return id_ in await self.__get_index() if self.switch and id_ else False
+
+    async def has_ids(self, ids: list | tuple | set) -> set[str]:
+        if not (self.switch and ids):
+            return set()
+        index = await self.__get_index()
+        return {i for i in ids if i and i in index}
 
     async def update_id(self, id_: str):
         if self.switch and id_:
+            self.__update_index("add", id_, )
             await self.database.write_download_data(id_)
 
     async def delete_id(self, id_: str) -> None:
         if self.switch and id_:
+            self.__update_index("remove", id_, )
             await self.database.delete_download_data(id_)
 
     async def delete_ids(self, ids: str) -> None:
         if ids.upper() == "ALL":
+            self.__update_index("clear")
             await self.database.delete_all_download_data()
         else:
             ids = self.__extract_ids(ids)
+            [self.__update_index("remove", i, ) for i in ids]
             await self.database.delete_download_data(ids)
 
     def __extract_ids(self, ids: str) -> list[str]:
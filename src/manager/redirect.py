@@ -0,0 +1,38 @@
+from time import time
+from typing import TYPE_CHECKING
+
+from ..custom import REDIRECT_CACHE_TTL
+
+if TYPE_CHECKING:
+    from .database import Database
+
+__all__ = ["RedirectCache"]
+
+
+class RedirectCache:
+    """链接重定向结果缓存，记录链接与最终链接的对应关系，超过有效期的缓存不会使用"""
+
+    def __init__(self, database: "Database", ttl: int = REDIRECT_CACHE_TTL, ):
+        self.database = database
+        self.ttl = ttl
+        self.pruned = False
+
+    async def read(self, urls: list[str], ) -> dict[str, str]:
+        """批量查询有效期内的缓存，返回链接与最终链接的对应关系"""
+        if not (self.ttl > 0 and urls):
+            return {}
+        await self.__prune()
+        return await self.database.read_redirect_data(urls, int(time()) - self.ttl, )
+
+    async def write(self, data: dict[str, str], ) -> None:
+        if not (self.ttl > 0 and data):
+            return
+        now = int(time())
+        await self.database.write_redirect_data([(k, v, now,) for k, v in data.items()])
+
+    async def __prune(self):
+        """首次使用时清理超过有效期的缓存"""
+        if self.pruned:
+            return
+        self.pruned = True
+        await self.database.delete_redirect_data(int(time()) - self.ttl, )
@@ -0,0 +1,62 @@
+from json import dumps
+from json import loads
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .database import Database
+
+__all__ = ["DownloadQueue"]
+
+
+class DownloadQueue:
+    """持久化下载任务队列，程序意外退出后可以恢复未完成的下载任务；
+    任务状态变更批量写入数据库，任务完成后直接删除"""
+    PENDING = 0
+    RUNNING = 1
+
+    def __init__(self, database: "Database", ):
+        self.database = database
+
+    async def add(self, tasks: list[tuple], tiktok=False, ) -> None:
+        if not tasks:
+            return
+        await self.database.write_task_data([
+            (
+                dumps(url) if isinstance(url, list) else url,
+                str(temp),
+                str(actual),
+                show,
+                id_,
+                suffix,
+                key,
+                int(tiktok),
+                self.PENDING,
+            ) for url, temp, actual, show, id_, suffix, key in tasks
+        ])
+
+    async def start(self, temp: Path, ) -> None:
+        await self.database.update_task_state(str(temp), self.RUNNING, )
+
+    async def finish(self, temp: Path, ) -> None:
+        await self.database.update_task_state(str(temp), None, )
+
+    async def reset(self, temp: Path, ) -> None:
+        await self.database.update_task_state(str(temp), self.PENDING, )
+
+    async def pending(self) -> list[tuple[tuple, bool]]:
+        """读取全部未完成的下载任务"""
+        return [
+            (
+                (
+                    loads(i["URL"]) if i["URL"].startswith("[") else i["URL"],
+                    Path(i["TEMP"]),
+                    Path(i["ACTUAL"]),
+                    i["SHOW"],
+                    i["ID"],
+                    i["SUFFIX"],
+                    i["KEY"],
+                ),
+                bool(i["TIKTOK"]),
+            ) for i in await self.database.read_task_data()
+        ]
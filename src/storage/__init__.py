@@ -1,3 +1,4 @@
 from .manager import RecordManager
+from .text import BaseTextLogger
 
-__all__ = ["RecordManager"]
+__all__ = ["RecordManager", "BaseTextLogger", ]
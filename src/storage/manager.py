@@ -1,9 +1,12 @@
+from pathlib import Path
 from typing import TYPE_CHECKING
 
 from .csv import CSVLogger
+from .parquet import ParquetLogger
 from .sqlite import SQLLogger
 from .text import BaseTextLogger
 from .xlsx import XLSXLogger
+from .xlsx import XLSXStreamLogger
 
 if TYPE_CHECKING:
     from ..config import Parameter
@@ -150,36 +153,47 @@ class RecordManager:
     hot_name = [i[1] for i in hot]
     hot_type = [i[2] for i in hot]
 
+    # primary_key: 数据表主键列名，重复采集时更新已有数据；indexes: 需要建立索引的列名；仅对 SQLite 格式生效
     LoggerParams = {
         "detail": {
             "db_name": "DetailData.db",
             "title_line": detail_name,
             "title_type": detail_type,
             "field_keys": detail_keys,
+            "primary_key": "作品ID",
+            "indexes": ("发布时间", "UID"),
         },
         "comment": {
             "db_name": "CommentData.db",
             "title_line": comment_name,
             "title_type": comment_type,
             "field_keys": comment_keys,
+            "primary_key": "评论ID",
+            "indexes": ("评论时间", "UID"),
         },
         "user": {
             "db_name": "UserData.db",
             "title_line": user_name,
             "title_type": user_type,
             "field_keys": user_keys,
+            "primary_key": "SEC_UID",
+            "indexes": ("UID",),
         },
         "mix": {
             "db_name": "MixData.db",
             "title_line": detail_name,
             "title_type": detail_type,
             "field_keys": detail_keys,
+            "primary_key": "作品ID",
+            "indexes": ("发布时间", "UID"),
         },
         "search_general": {
             "db_name": "SearchData.db",
             "title_line": detail_name,
             "title_type": detail_type,
             "field_keys": detail_keys,
+            "primary_key": "作品ID",
+            "indexes": ("发布时间", "UID"),
         },
         "search_user": {
             "db_name": "SearchData.db",
@@ -203,10 +217,20 @@ class RecordManager:
     DataLogger = {
         "csv": CSVLogger,
         "xlsx": XLSXLogger,
+        "xlsx_stream": XLSXStreamLogger,
+        "parquet": ParquetLogger,
         "sql": SQLLogger,
         # "mysql": BaseTextLogger,
     }
 
+    def __init__(self, ):
+        self.roots: set[Path] = set()  # 本次运行使用过的数据储存文件夹
+
+    @staticmethod
+    def data_root(parameter: "Parameter", folder="", ) -> Path:
+        return parameter.root.joinpath(
+            parameter.CLEANER.filter_name(folder, "Data"))
+
     def run(
             self,
             parameter: "Parameter",
@@ -214,10 +238,20 @@ class RecordManager:
             type_="detail",
             blank=False,
     ):
-        root = parameter.root.joinpath(
-            parameter.CLEANER.filter_name(folder, "Data"))
+        root = self.data_root(parameter, folder, )
         root.mkdir(exist_ok=True)
+        self.roots.add(root)
         params = self.LoggerParams[type_]
         logger = BaseTextLogger if blank else self.DataLogger.get(
             parameter.storage_format, BaseTextLogger)
         return root, params, logger
+
+    def consolidate_xlsx(self, parameter: "Parameter") -> dict[Path, int]:
+        """合并数据储存文件夹中的全部 XLSX 分片文件夹，返回各主文件合并的数据行数；
+        仅查找默认数据储存文件夹与本次运行使用过的数据储存文件夹，不遍历下载文件夹"""
+        result = {
+            i.with_suffix(".xlsx"): XLSXStreamLogger.consolidate(i)
+            for root in {self.data_root(parameter)} | self.roots if root.is_dir()
+            for i in root.glob("*.parts") if i.is_dir()
+        }
+        return {k: v for k, v in result.items() if v}
@@ -0,0 +1,119 @@
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+try:
+    import pyarrow as pa
+    from pyarrow import parquet as pq
+except ImportError:  # pyarrow 为可选依赖
+    pa = pq = None
+
+from ..custom import PARQUET_ROW_GROUP
+from .text import BaseTextLogger
+
+if TYPE_CHECKING:
+    from typing import Iterable
+
+    from ..tools import ColorfulConsole
+
+__all__ = ["ParquetLogger"]
+
+
+def convert_integer(value):
+    if isinstance(value, int):
+        return value
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def convert_text(value):
+    if value is None:
+        return None
+    if isinstance(value, list):
+        return " ".join(value)
+    return str(value)
+
+
+class ParquetLogger(BaseTextLogger):
+    """Parquet 格式保存数据，按列类型缓存数据并分批写入压缩的行组；每次运行写入数据集文件夹中的新文件"""
+    __type = "parquet"
+    missing = "" if pa else "pyarrow"  # 缺少的依赖库名称
+
+    def __init__(
+            self,
+            root: Path,
+            title_line: tuple,
+            title_type: tuple,
+            field_keys: tuple,
+            console: "ColorfulConsole",
+            old=None,
+            name="Solo_Download",
+            *args,
+            **kwargs):
+        super().__init__(*args, **kwargs)
+        self.console = console
+        self.writer = None  # 当前数据文件的写入对象
+        self.name = self._rename(root, self.__type, old, name)  # 文件名称
+        self.folder = root.joinpath(f"{self.name}.{self.__type}")  # 数据集文件夹
+        self.title_line = title_line  # 列名
+        self.title_type = title_type  # 列数据类型
+        self.field_keys = field_keys
+        self.converters = tuple(
+            convert_integer if i == "INTEGER" else convert_text for i in title_type)
+        self.schema = pa.schema(
+            [(i, pa.int64() if j == "INTEGER" else pa.string())
+             for i, j in zip(title_line, title_type)])
+        self.columns = [[] for _ in title_line]  # 按列缓存的数据
+        self.rows = 0  # 缓存的数据行数
+
+    async def __aenter__(self):
+        self.folder.mkdir(exist_ok=True)
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.__flush()
+        if self.writer:
+            self.writer.close()
+            self.writer = None
+        elif not any(self.folder.iterdir()):
+            self.folder.rmdir()
+
+    async def save(self, data: "Iterable", *args, **kwargs):
+        # 保留数据原始类型，由列类型决定转换方式
+        return await self._save(data, *args, **kwargs)
+
+    async def save_many(self, data: list["Iterable"], *args, **kwargs):
+        return await self._save_many(data, *args, **kwargs)
+
+    async def _save(self, data, *args, **kwargs):
+        for column, converter, value in zip(self.columns, self.converters, data):
+            column.append(converter(value))
+        self.rows += 1
+        if self.rows >= PARQUET_ROW_GROUP:
+            self.__flush()
+
+    def __open_writer(self):
+        index = max(
+            (int(i.stem.split("-", 1)[-1]) for i in self.folder.glob("part-*.parquet")
+             if i.stem.split("-", 1)[-1].isdigit()),
+            default=0)
+        self.writer = pq.ParquetWriter(
+            self.folder.joinpath(f"part-{index + 1:04d}.parquet"),
+            self.schema,
+            compression="zstd",
+        )
+
+    def __flush(self):
+        """将缓存的数据写入为一个行组"""
+        if not self.rows:
+            return
+        if not self.writer:
+            self.__open_writer()
+        table = pa.Table.from_arrays(
+            [pa.array(column, type=field.type) for column, field in zip(self.columns, self.schema)],
+            schema=self.schema,
+        )
+        self.writer.write_table(table, row_group_size=self.rows)
+        self.columns = [[] for _ in self.title_line]
+        self.rows = 0
@@ -20,10 +20,13 @@ class SQLLogger(BaseSQLLogger):
             field_keys: tuple,
             old=None,
             name="Solo_Download",
+            primary_key: str = None,
+            indexes: tuple = (),
             *args,
             **kwargs, ):
         super().__init__(*args, **kwargs)
         self.db = None  # 数据库
+        self.insert_sql = ""  # 插入数据语句，创建数据表后生成
         self.cursor = None  # 游标对象
         self.name = (old, name)  # 数据表名称
         self.file = db_name  # 数据库文件名称
@@ -31,10 +34,14 @@ class SQLLogger(BaseSQLLogger):
         self.title_line = title_line  # 数据表列名
         self.title_type = title_type  # 数据表数据类型
         self.field_keys = field_keys
+        self.primary_key = primary_key  # 数据表主键列名
+        self.indexes = indexes  # 需要建立索引的列名
 
     async def __aenter__(self):
         self.db = await connect(self.path)
         self.cursor = await self.db.cursor()
+        await self.cursor.execute("PRAGMA journal_mode=WAL;")
+        await self.cursor.execute("PRAGMA synchronous=NORMAL;")
         await self.update_sheet()
         await self.create()
         return self
@@ -43,15 +50,60 @@ class SQLLogger(BaseSQLLogger):
         await self.db.close()
 
     async def create(self):
-        create_sql = f"""CREATE TABLE IF NOT EXISTS {self.name} ({", ".join(
-            [f"{i} {j}" for i, j in zip(self.title_line, self.title_type)])});"""
-        await self.cursor.execute(create_sql)
+        await self.cursor.execute(self.__create_sql(self.name))
+        await self.__migrate_primary_key()
+        for column in self.indexes:
+            await self.cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.name}_{column} ON {self.name} ({column});")
         await self.db.commit()
+        self.insert_sql = self.__insert_sql()
+
+    def __create_sql(self, name: str) -> str:
+        columns = [
+            f"{i} {j} PRIMARY KEY" if i == self.primary_key else f"{i} {j}"
+            for i, j in zip(self.title_line, self.title_type)
+        ]
+        return f"""CREATE TABLE IF NOT EXISTS {name} ({", ".join(columns)});"""
+
+    def __insert_sql(self) -> str:
+        insert_sql = f"""INSERT INTO {self.name} ({", ".join(self.title_line)}) VALUES ({
+        ", ".join(["?" for _ in self.title_line])})"""
+        if not self.primary_key:
+            return f"{insert_sql};"
+        update = ", ".join(f"{i} = excluded.{i}" for i in self.title_line if i != self.primary_key)
+        return f"{insert_sql} ON CONFLICT({self.primary_key}) DO UPDATE SET {update};"
+
+    async def __migrate_primary_key(self):
+        """旧版本数据表没有主键，按主键去重后重建数据表，保留最后写入的数据"""
+        if not self.primary_key:
+            return
+        await self.cursor.execute(f"PRAGMA table_info({self.name});")
+        columns = {i[1]: i[5] for i in await self.cursor.fetchall()}
+        if self.primary_key not in columns or columns[self.primary_key]:
+            return
+        temp = f"{self.name}_migrate"
+        common = ", ".join(i for i in self.title_line if i in columns)
+        await self.cursor.execute(f"DROP TABLE IF EXISTS {temp};")
+        await self.cursor.execute(self.__create_sql(temp))
+        await self.cursor.execute(
+            f"""INSERT INTO {temp} ({common}) SELECT {common} FROM {self.name} WHERE rowid IN (
+            SELECT MAX(rowid) FROM {self.name} GROUP BY {self.primary_key});""")
+        await self.cursor.execute(f"DROP TABLE {self.name};")
+        await self.cursor.execute(f"ALTER TABLE {temp} RENAME TO {self.name};")
 
     async def _save(self, data, *args, **kwargs):
-        insert_sql = f"""REPLACE INTO {self.name} ({", ".join(self.title_line)}) VALUES ({
-        ", ".join(["?" for _ in self.title_line])});"""
-        await self.cursor.execute(insert_sql, data)
+        await self.cursor.execute(self.insert_sql, data)
+        await self.db.commit()
+
+    async def _save_many(self, data, *args, **kwargs):
+        """单个事务内批量写入数据"""
+        if not data:
+            return
+        try:
+            await self.cursor.executemany(self.insert_sql, data)
+        except Exception:
+            await self.db.rollback()
+            raise
         await self.db.commit()
 
     async def update_sheet(self):
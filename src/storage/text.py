@@ -8,18 +8,29 @@ if TYPE_CHECKING:
     from typing import Iterable
 
 
+def convert_row(data: Union["Iterable", list]) -> Union["Iterable", list]:
+    for index, value in enumerate(data):
+        if isinstance(value, (int, float)):  # 如果值是数字（整型或浮点型）
+            data[index] = str(value)  # 转换为字符串
+        elif isinstance(value, list):  # 如果值是列表
+            data[index] = " ".join(value)  # 将列表元素转换为字符串并连接
+    return data
+
+
 def convert_to_string(function):
     async def _convert_to_string(self, data: Union["Iterable", list], *args, **kwargs):
-        for index, value in enumerate(data):
-            if isinstance(value, (int, float)):  # 如果值是数字（整型或浮点型）
-                data[index] = str(value)  # 转换为字符串
-            elif isinstance(value, list):  # 如果值是列表
-                data[index] = " ".join(value)  # 将列表元素转换为字符串并连接
-        return await function(self, data, *args, **kwargs)
+        return await function(self, convert_row(data), *args, **kwargs)
 
     return _convert_to_string
 
 
+def convert_rows_to_string(function):
+    async def _convert_rows_to_string(self, data: list[Union["Iterable", list]], *args, **kwargs):
+        return await function(self, [convert_row(i) for i in data], *args, **kwargs)
+
+    return _convert_rows_to_string
+
+
 class BaseTextLogger:
     def __init__(self, *args, **kwargs):
         self.field_keys = []
@@ -39,6 +50,16 @@ class BaseTextLogger:
         # 实际数据保存逻辑
         pass
 
+    @convert_rows_to_string
+    async def save_many(self, data: list["Iterable"], *args, **kwargs):
+        # 批量数据保存方法入口
+        return await self._save_many(data, *args, **kwargs)
+
+    async def _save_many(self, data: list["Iterable"], *args, **kwargs):
+        # 实际批量数据保存逻辑，默认逐条保存，子类可按存储格式批量写入
+        for i in data:
+            await self._save(i, *args, **kwargs)
+
     @classmethod
     def _rename(cls, root: Path, type_: str, old: str, new_: str) -> str:
         mark = new_.split("_", 1)
@@ -4,12 +4,13 @@ from typing import TYPE_CHECKING
 from openpyxl import Workbook
 from openpyxl import load_workbook
 
+from ..custom import XLSX_SHARD_ROWS
 from .text import BaseTextLogger
 
 if TYPE_CHECKING:
     from ..tools import ColorfulConsole
 
-__all__ = ["XLSXLogger"]
+__all__ = ["XLSXLogger", "XLSXStreamLogger"]
 
 
 class XLSXLogger(BaseTextLogger):
@@ -54,3 +55,100 @@ class XLSXLogger(BaseTextLogger):
 
     async def _save(self, data, *args, **kwargs):
         self.sheet.append(data)
+
+    async def _save_many(self, data, *args, **kwargs):
+        for i in data:
+            self.sheet.append(i)
+
+
+class XLSXStreamLogger(BaseTextLogger):
+    """XLSX 格式流式保存数据，每次运行写入新的分片文件，不读取已有数据；分片文件按需合并至 XLSX 主文件"""
+    __type = "xlsx"
+    __parts = "parts"
+
+    def __init__(
+            self,
+            root: Path,
+            title_line: tuple,
+            field_keys: tuple,
+            console: "ColorfulConsole",
+            old=None,
+            name="Solo_Download",
+            *args,
+            **kwargs):
+        super().__init__(*args, **kwargs)
+        self.console = console
+        self.book = None  # 当前分片的只写数据簿
+        self.sheet = None  # 当前分片的数据表
+        self.shard = None  # 当前分片文件路径
+        self.rows = 0  # 当前分片已写入的数据行数
+        self._rename(root, self.__type, old, name)
+        self.name = self._rename(root, self.__parts, old, name)  # 文件名称
+        self.folder = self.parts_folder(root, self.name)  # 分片文件夹
+        self.title_line = title_line  # 标题行
+        self.field_keys = field_keys
+
+    @classmethod
+    def parts_folder(cls, root: Path, name: str) -> Path:
+        return root.joinpath(f"{name}.{cls.__parts}")
+
+    async def __aenter__(self):
+        self.folder.mkdir(exist_ok=True)
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.__close_shard()
+        if not any(self.folder.iterdir()):
+            self.folder.rmdir()
+
+    def __open_shard(self):
+        index = max((int(i.stem) for i in self.folder.glob("*.xlsx") if i.stem.isdigit()), default=0)
+        self.shard = self.folder.joinpath(f"{index + 1:04d}.xlsx")
+        self.book = Workbook(write_only=True)
+        self.sheet = self.book.create_sheet()
+        self.sheet.append(self.title_line)
+        self.rows = 0
+
+    def __close_shard(self):
+        if self.book:
+            self.book.save(self.shard)
+            self.book = None
+            self.sheet = None
+
+    async def _save(self, data, *args, **kwargs):
+        if not self.book:
+            self.__open_shard()
+        self.sheet.append(data)
+        self.rows += 1
+        if self.rows >= XLSX_SHARD_ROWS:
+            self.__close_shard()
+
+    @classmethod
+    def consolidate(cls, folder: Path) -> int:
+        """将分片文件夹中的数据按写入顺序合并至 XLSX 主文件，返回合并的数据行数"""
+        shards = sorted(i for i in folder.glob("*.xlsx") if i.stem.isdigit())
+        if not shards:
+            return 0
+        archive = folder.with_suffix(f".{cls.__type}")
+        temp = folder.with_suffix(f".merge.{cls.__type}")
+        book = Workbook(write_only=True)
+        sheet = book.create_sheet()
+        title, count = False, 0
+        for source in ([archive] if archive.exists() else []) + shards:
+            reader = load_workbook(source, read_only=True)
+            for index, row in enumerate(reader.active.iter_rows(values_only=True)):
+                if index == 0:
+                    if not title:
+                        sheet.append(row)
+                        title = True
+                    continue
+                sheet.append(row)
+                count += source is not archive
+            reader.close()
+        book.save(temp)
+        temp.replace(archive)
+        for i in shards:
+            i.unlink()
+        if not any(folder.iterdir()):
+            folder.rmdir()
+        return count
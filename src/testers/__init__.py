@@ -1,2 +1,3 @@
+from src.testers.database import temporary_database
 from src.testers.logger import Logger
 from src.testers.params import Params
@@ -0,0 +1,13 @@
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+from src.manager import Database
+
+
+@asynccontextmanager
+async def temporary_database(root: Path, ):
+    """在指定文件夹中创建数据库，用于测试"""
+    database = Database()
+    database.file = root.joinpath("TikTokDownloader.db")
+    async with database:
+        yield database
@@ -7,6 +7,7 @@ from src.custom import (
 from src.encrypt import ABogus
 from src.encrypt import XBogus
 from src.testers.logger import Logger
+from src.tools import RateLimiter
 from src.tools import create_client
 
 
@@ -24,6 +25,9 @@ class Params:
         self.max_retry = 0
         self.timeout = 5
         self.max_pages = 2
+        self.archive = None
+        self.redirect = None
+        self.limiter = RateLimiter()
         self.client = create_client(timeout=self.timeout, )
         self.client_tiktok = create_client(
             timeout=self.timeout, proxy="http://127.0.0.1:10809", )
@@ -0,0 +1,80 @@
+from asyncio import run
+
+from src.manager import ResponseArchive
+from src.testers import temporary_database
+
+POST = "https://www.douyin.com/aweme/v1/web/aweme/post/"
+DETAIL = "https://www.douyin.com/aweme/v1/web/aweme/detail/"
+TIKTOK = "https://www.tiktok.com/api/item/detail/"
+SEARCH = "https://www.douyin.com/aweme/v1/web/general/search/single/"
+COMMENT = "https://www.tiktok.com/api/comment/list/"
+
+
+def generate_archive(database, root, ) -> ResponseArchive:
+    archive = ResponseArchive(database, True, )
+    archive.root = root.joinpath("Archive")
+    return archive
+
+
+async def write_pages(archive: ResponseArchive, ):
+    for page in range(3):
+        await archive.write(
+            POST,
+            {"sec_user_id": "user", "max_cursor": page},
+            {"aweme_list": [{"aweme_id": f"{page}-{i}"} for i in range(2)], "has_more": 1},
+        )
+    await archive.write(DETAIL, {"aweme_id": "detail"}, {"aweme_detail": {"aweme_id": "detail"}}, )
+    await archive.write(TIKTOK, {"itemId": "tiktok"}, {"itemInfo": {"itemStruct": {"id": "tiktok"}}}, )
+    await archive.write(SEARCH, {"keyword": "search"}, {"data": []}, )
+
+
+def test_archive_read(tmp_path):
+    async def main():
+        async with temporary_database(tmp_path) as database:
+            archive = generate_archive(database, tmp_path, )
+            await write_pages(archive)
+            records = [i async for i in archive.read()]
+            assert [i["id"] for i in records] == ["user", "user", "user", "detail", "tiktok", "search"]
+            assert records[1]["data"]["aweme_list"][0]["aweme_id"] == "1-0"
+            assert [i["id"] async for i in archive.read(endpoint="/aweme/v1/web/aweme/detail/")] == ["detail"]
+            assert [i["id"] async for i in archive.read(host="www.tiktok.com")] == ["tiktok"]
+            assert [i["data"]["has_more"] async for i in archive.read(id_="user")] == [1, 1, 1]
+
+    run(main())
+
+
+def test_archive_replay(tmp_path, monkeypatch):
+    monkeypatch.setattr(ResponseArchive, "REPLAY_BATCH", 3)
+
+    async def main():
+        async with temporary_database(tmp_path) as database:
+            archive = generate_archive(database, tmp_path, )
+            await write_pages(archive)
+            await archive.write(COMMENT, {"aweme_id": "tiktok"}, {"comments": [{"cid": "1"}]}, )
+            await archive.write(COMMENT, {"aweme_id": "tiktok"}, {"comments": [{"cid": "2"}]}, )
+            return [
+                (type_, tiktok, [i.get("aweme_id") or i.get("id") for i in data])
+                async for type_, tiktok, data in archive.replay(warning=warnings.append)
+            ]
+
+    warnings = []
+    # 同类数据合并为批次，不支持重新提取的接口数据被跳过
+    assert run(main()) == [
+        ("detail", False, ["0-0", "0-1", "1-0", "1-1"]),
+        ("detail", False, ["2-0", "2-1", "detail"]),
+        ("detail", True, ["tiktok"]),
+    ]
+    assert len(warnings) == 2
+    assert "www.tiktok.com/api/comment/list/" in warnings[1]
+
+
+def test_archive_disabled(tmp_path):
+    async def main():
+        async with temporary_database(tmp_path) as database:
+            archive = ResponseArchive(database, False, )
+            archive.root = tmp_path.joinpath("Archive")
+            await write_pages(archive)
+            assert not archive.root.exists()
+            assert not [i async for i in archive.read()]
+
+    run(main())
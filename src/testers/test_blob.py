@@ -0,0 +1,65 @@
+from asyncio import run
+
+from src.manager import BlobStore
+from src.testers import temporary_database
+
+
+def generate_store(database, root, ) -> BlobStore:
+    store = BlobStore(database, True, )
+    store.root = root.joinpath("Blob")
+    return store
+
+
+def test_blob_store_deduplicate(tmp_path):
+    first = tmp_path.joinpath("first.mp4")
+    second = tmp_path.joinpath("second.mp4")
+    first.write_bytes(b"content")
+    second.write_bytes(b"content")
+
+    async def main():
+        async with temporary_database(tmp_path) as database:
+            store = generate_store(database, tmp_path, )
+            assert await store.link("1:downloads", tmp_path.joinpath("first"), ) is None
+            await store.store("1:downloads", first, )
+            await store.store("2:downloads", second, )
+            # 相同内容的文件替换为指向同一文件的硬链接
+            assert first.stat().st_ino == second.stat().st_ino
+            assert first.stat().st_nlink == 3
+            target = await store.link("1:downloads", tmp_path.joinpath("copy"), )
+            assert target == tmp_path.joinpath("copy.mp4")
+            assert target.stat().st_ino == first.stat().st_ino
+            assert target.read_bytes() == b"content"
+
+    run(main())
+
+
+def test_blob_store_prune(tmp_path):
+    file = tmp_path.joinpath("file.mp4")
+    file.write_bytes(b"content")
+
+    async def main():
+        async with temporary_database(tmp_path) as database:
+            await generate_store(database, tmp_path, ).store("1:downloads", file, )
+        file.unlink()
+        async with temporary_database(tmp_path) as database:
+            store = generate_store(database, tmp_path, )
+            # 首次使用时清理不再被引用的文件
+            assert await store.link("1:downloads", tmp_path.joinpath("file"), ) is None
+            assert not any(store.root.rglob("*.mp4"))
+            assert not await database.read_blob_data()
+
+    run(main())
+
+
+def test_blob_store_disabled(tmp_path):
+    file = tmp_path.joinpath("file.mp4")
+    file.write_bytes(b"content")
+
+    async def main():
+        async with temporary_database(tmp_path) as database:
+            store = BlobStore(database, False, )
+            await store.store("1:downloads", file, )
+            assert await store.link("1:downloads", tmp_path.joinpath("copy"), ) is None
+            assert file.stat().st_nlink == 1
+
+    run(main())
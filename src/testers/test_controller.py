@@ -0,0 +1,30 @@
+from src.downloader import ConcurrencyController
+
+URL = "https://www.douyin.com/aweme/v1/play/"
+
+
+def test_controller_throttle_and_error():
+    controller = ConcurrencyController(4, 8, 16, )
+    assert controller.throttle(URL) == 2
+    assert controller.error(URL) == 1
+    assert controller.error(URL) == 1
+
+
+def test_controller_success_window():
+    controller = ConcurrencyController(2, 3, 16, )
+    controller.success(URL, 1024, )
+    assert controller.limit(URL) == 2
+    controller.success(URL, 1024, )
+    assert controller.limit(URL) == 3
+    for _ in range(3):
+        controller.success(URL, 1024, )
+    # 达到单个主机的并发上限
+    assert controller.limit(URL) == 3
+
+
+def test_controller_cooldown_after_throttle():
+    controller = ConcurrencyController(4, 8, 16, )
+    controller.throttle(URL)
+    for _ in range(4):
+        controller.success(URL, 1024, )
+    assert controller.limit(URL) == 2
@@ -0,0 +1,41 @@
+from pytest import approx
+
+from src.tools import RateLimiter
+from src.tools.limiter import TokenBucket
+
+URL = "https://www.douyin.com/aweme/v1/web/aweme/post/"
+
+
+def test_token_bucket_burst():
+    bucket = TokenBucket(1, 2, )
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == approx(1, abs=0.05)
+
+
+def test_limiter_throttle_decreases_multiplicatively():
+    limiter = RateLimiter({"default": (1, 1)})
+    assert limiter.throttle(URL) == approx(2)
+    assert limiter.throttle(URL) == approx(4)
+    # 冷却期间不提高速率
+    assert limiter.success(URL) == approx(4)
+
+
+def test_limiter_success_increases_additively():
+    limiter = RateLimiter({"default": (1, 1)})
+    limiter.throttle(URL)
+    limiter.bucket(*limiter.split(URL), "").cooldown = 0
+    assert limiter.success(URL) == approx(1 / 0.55)
+    for _ in range(100):
+        limiter.success(URL)
+    assert limiter.success(URL) == approx(1 / RateLimiter.CEILING)
+
+
+def test_limiter_floor_and_identity():
+    limiter = RateLimiter({"default": (1, 1)})
+    for _ in range(20):
+        limiter.throttle(URL)
+    assert limiter.bucket(*limiter.split(URL), "").interval == approx(1 / RateLimiter.FLOOR)
+    # 不同身份使用独立的令牌桶
+    assert limiter.success(URL, RateLimiter.identity("cookie")) == approx(1 / 1.05)
+
@@ -0,0 +1,38 @@
+from asyncio import gather
+from asyncio import run
+
+from src.manager import DownloadRecorder
+from src.manager.recorder import DownloadIndex
+from src.testers import temporary_database
+
+
+def test_download_index():
+    index = DownloadIndex()
+    index.load(["3", "1", "abc"])
+    index.load(["2"])
+    index.compact()
+    assert list(index.ids) == [1, 2, 3]
+    index.add("5")
+    index.remove("2")
+    assert all(i in index for i in ("1", "3", "5", "abc"))
+    assert "2" not in index
+
+
+def test_recorder_concurrent_load(tmp_path):
+    async def main():
+        async with temporary_database(tmp_path) as database:
+            await database.database.executemany(
+                "INSERT INTO download_data (ID) VALUES (?)", ((str(i),) for i in range(1000)))
+            await database.database.commit()
+            recorder = DownloadRecorder(database, True, None, )
+            result = await gather(
+                recorder.has_ids(["1", "2000"]),
+                recorder.update_id("2000"),
+                recorder.delete_id("1"),
+                recorder.has_id("999"),
+            )
+            assert result[0] == {"2000"} and result[3]
+            # 载入索引期间的下载记录变更不会丢失
+            assert await recorder.has_ids(["1", "2000"]) == {"2000"}
+
+    run(main())
@@ -0,0 +1,113 @@
+from asyncio import run
+from json import loads
+from os import urandom
+from types import SimpleNamespace
+
+from httpx import AsyncByteStream
+from httpx import AsyncClient
+from httpx import MockTransport
+from httpx import ReadError
+from httpx import Response
+from rich.progress import Progress
+
+from src.downloader import Downloader
+from src.testers import Logger
+
+DATA = urandom(3000)
+
+
+class Recorder:
+    def __init__(self):
+        self.ids = set()
+
+    async def update_id(self, id_: str, ):
+        self.ids.add(id_)
+
+    async def delete_id(self, id_: str, ):
+        self.ids.discard(id_)
+
+
+class BrokenStream(AsyncByteStream):
+    """返回部分数据后中断"""
+
+    def __init__(self, data: bytes, ):
+        self.data = data
+
+    async def __aiter__(self):
+        yield self.data
+        raise ReadError("中断")
+
+
+def generate_downloader() -> Downloader:
+    downloader = object.__new__(Downloader)
+    downloader.log = Logger()
+    downloader.recorder = Recorder()
+    downloader.chunk = 100
+    downloader.truncate = 50
+    downloader.blob_keys = {}
+    return downloader
+
+
+def generate_record() -> dict:
+    return {
+        "length": len(DATA),
+        "suffix": "mp4",
+        "segments": [[i, i + 999, 0] for i in range(0, len(DATA), 1000)],
+    }
+
+
+def transport(requests: list[int], broken: int = None, ) -> MockTransport:
+    def handler(request):
+        start, end = request.headers["Range"][6:].split("-")
+        start, end = int(start), int(end)
+        requests.append(start)
+        headers = {"Content-Range": f"bytes {start}-{end}/{len(DATA)}"}
+        if start == broken:
+            return Response(206, headers=headers, stream=BrokenStream(DATA[start:start + 300]), )
+        return Response(206, headers=headers, content=DATA[start:end + 1], )
+
+    return MockTransport(handler)
+
+
+async def download(downloader: Downloader, cache, actual, record: dict, requests: list[int], broken=None, ):
+    async with AsyncClient(transport=transport(requests, broken, )) as client:
+        result = await downloader.download_segments(
+            client,
+            "https://example.com/video",
+            {},
+            cache,
+            actual,
+            "test",
+            "1",
+            record,
+            SimpleNamespace(),
+            Progress(),
+        )
+    # 等待写入线程完成已提交的写入与分段记录保存
+    Downloader.writer.shutdown()
+    return result
+
+
+def test_segments_resume(tmp_path):
+    downloader = generate_downloader()
+    cache = tmp_path.joinpath("video")
+    actual = tmp_path.joinpath("video.mp4")
+    requests = []
+    assert not run(download(downloader, cache, actual, generate_record(), requests, 1000, ))
+
+    sidecar = cache.with_name(f"{cache.name}.json")
+    record = loads(sidecar.read_text(encoding="UTF-8"))
+    content = cache.read_bytes()
+    # 分段记录的进度不超过已写入的数据
+    assert [i[2] for i in record["segments"]] == [1000, 300, 1000]
+    for start, _, done in record["segments"]:
+        assert content[start:start + done] == DATA[start:start + done]
+
+    requests.clear()
+    record = downloader._Downloader__read_segments_record(cache)
+    assert run(download(downloader, cache, actual, record, requests, ))
+    # 仅请求未完成的数据
+    assert requests == [1300]
+    assert actual.read_bytes() == DATA
+    assert not sidecar.exists()
+    assert downloader.recorder.ids == {"1"}
@@ -0,0 +1,58 @@
+from asyncio import run
+from sqlite3 import connect
+
+from src.storage.sqlite import SQLLogger
+
+TITLE = ("ID", "TEXT_VALUE", "COUNT")
+TYPE = ("TEXT", "TEXT", "INTEGER")
+
+
+def generate_logger(root, ) -> SQLLogger:
+    return SQLLogger(
+        root,
+        "Test.db",
+        TITLE,
+        TYPE,
+        TITLE,
+        name="records",
+        primary_key="ID",
+        indexes=("COUNT",),
+    )
+
+
+def read_rows(root, ) -> list[tuple]:
+    with connect(root.joinpath("Test.db")) as database:
+        return database.execute("SELECT ID, TEXT_VALUE, COUNT FROM records ORDER BY ID").fetchall()
+
+
+def test_sqlite_migrate_primary_key(tmp_path):
+    with connect(tmp_path.joinpath("Test.db")) as database:
+        database.execute("CREATE TABLE records (ID TEXT, TEXT_VALUE TEXT, COUNT INTEGER);")
+        database.executemany(
+            "INSERT INTO records VALUES (?,?,?)",
+            [("1", "old", 1), ("2", "only", 2), ("1", "new", 3)],
+        )
+
+    async def main():
+        async with generate_logger(tmp_path):
+            pass
+
+    run(main())
+    # 按主键去重，保留最后写入的数据
+    assert read_rows(tmp_path) == [("1", "new", 3), ("2", "only", 2)]
+    with connect(tmp_path.joinpath("Test.db")) as database:
+        columns = database.execute("PRAGMA table_info(records);").fetchall()
+        indexes = database.execute("PRAGMA index_list(records);").fetchall()
+    assert [i[1] for i in columns if i[5]] == ["ID"]
+    assert "records_COUNT" in {i[1] for i in indexes}
+
+
+def test_sqlite_upsert(tmp_path):
+    async def main():
+        async with generate_logger(tmp_path) as logger:
+            await logger.save_many([["1", "a", 1], ["2", "b", 2]])
+            await logger.save_many([["1", "c", 5]])
+            await logger.save(["3", "d", 3])
+
+    run(main())
+    assert read_rows(tmp_path) == [("1", "c", 5), ("2", "b", 2), ("3", "d", 3)]
@@ -0,0 +1,67 @@
+from asyncio import run
+from pathlib import Path
+
+from src.manager import DownloadQueue
+from src.testers import temporary_database
+
+
+def generate_tasks(count: int) -> list[tuple]:
+    return [
+        (
+            [f"https://example.com/{i}", f"https://mirror.example.com/{i}"],
+            Path(f"cache/{i}"),
+            Path(f"download/{i}"),
+            f"作品 {i}",
+            str(i),
+            "mp4",
+            "downloads",
+        ) for i in range(count)
+    ]
+
+
+async def read_states(database) -> dict[str, int]:
+    await database.cursor.execute("SELECT TEMP, STATE FROM download_task")
+    return {Path(i["TEMP"]).name: i["STATE"] for i in await database.cursor.fetchall()}
+
+
+def test_queue_state_machine(tmp_path):
+    async def main():
+        async with temporary_database(tmp_path) as database:
+            queue = DownloadQueue(database)
+            tasks = generate_tasks(4)
+            await queue.add(tasks, True, )
+            for task in tasks:
+                await queue.start(task[1])
+            await queue.finish(tasks[0][1])
+            await queue.reset(tasks[1][1])
+            pending = await queue.pending()
+            assert [i[0][4] for i in pending] == ["1", "2", "3"]
+            assert all(tiktok for _, tiktok in pending)
+            assert pending[0][0][0] == tasks[1][0]
+            # 已完成的任务直接删除
+            assert await read_states(database) == {
+                "1": DownloadQueue.PENDING,
+                "2": DownloadQueue.RUNNING,
+                "3": DownloadQueue.RUNNING,
+            }
+            await queue.start(tasks[1][1])
+            # 重新添加的任务覆盖尚未写入的旧状态
+            await queue.add(tasks[1:2])
+            assert (await read_states(database))["1"] == DownloadQueue.PENDING
+
+    run(main())
+
+
+def test_queue_state_flushed_on_close(tmp_path):
+    async def main():
+        async with temporary_database(tmp_path) as database:
+            queue = DownloadQueue(database)
+            tasks = generate_tasks(2)
+            await queue.add(tasks)
+            await queue.start(tasks[0][1])
+            await queue.finish(tasks[1][1])
+        async with temporary_database(tmp_path) as database:
+            assert await read_states(database) == {"0": DownloadQueue.RUNNING}
+
+    run(main())
+
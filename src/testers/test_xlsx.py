@@ -0,0 +1,65 @@
+from asyncio import run
+from types import SimpleNamespace
+
+from openpyxl import Workbook
+from openpyxl import load_workbook
+
+from src.storage import RecordManager
+from src.storage import xlsx
+from src.storage.xlsx import XLSXStreamLogger
+from src.tools import Cleaner
+
+TITLE = ("ID", "VALUE")
+
+
+def read_rows(path) -> list[tuple]:
+    return list(load_workbook(path, read_only=True).active.iter_rows(values_only=True))
+
+
+def test_xlsx_stream_consolidate(tmp_path, monkeypatch):
+    monkeypatch.setattr(xlsx, "XLSX_SHARD_ROWS", 3)
+    book = Workbook()
+    book.active.append(TITLE)
+    book.active.append(("old", 0))
+    book.save(tmp_path.joinpath("records.xlsx"))
+
+    async def main():
+        for index in range(2):
+            async with XLSXStreamLogger(tmp_path, TITLE, TITLE, None, name="records", ) as logger:
+                await logger.save_many([[f"{index}-{i}", i] for i in range(4)])
+        async with XLSXStreamLogger(tmp_path, TITLE, TITLE, None, name="empty", ):
+            pass
+
+    run(main())
+    folder = XLSXStreamLogger.parts_folder(tmp_path, "records")
+    assert sorted(i.name for i in folder.iterdir()) == ["0001.xlsx", "0002.xlsx", "0003.xlsx", "0004.xlsx"]
+    # 未写入数据时不保留分片文件夹
+    assert not XLSXStreamLogger.parts_folder(tmp_path, "empty").exists()
+
+    assert XLSXStreamLogger.consolidate(folder) == 8
+    assert read_rows(tmp_path.joinpath("records.xlsx")) == [
+        TITLE,
+        ("old", 0),
+        # 新数据按文本格式保存
+        *((f"{index}-{i}", str(i)) for index in range(2) for i in range(4)),
+    ]
+    assert not folder.exists()
+    assert XLSXStreamLogger.consolidate(folder) == 0
+
+
+def test_record_manager_consolidate_data_folder(tmp_path):
+    parameter = SimpleNamespace(root=tmp_path, CLEANER=Cleaner(), storage_format="xlsx_stream", )
+    manager = RecordManager()
+    root, _, _ = manager.run(parameter)
+    download = tmp_path.joinpath("Account", "Works")
+    download.mkdir(parents=True)
+
+    async def main():
+        for folder in (root, download):
+            async with XLSXStreamLogger(folder, TITLE, TITLE, None, name="records", ) as logger:
+                await logger.save_many([["1", 1], ["2", 2]])
+
+    run(main())
+    assert manager.consolidate_xlsx(parameter) == {root.joinpath("records.xlsx"): 2}
+    # 不查找数据储存文件夹以外的分片文件夹
+    assert XLSXStreamLogger.parts_folder(download, "records").exists()
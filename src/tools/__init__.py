@@ -15,6 +15,7 @@ from .format import (
     cookie_str_to_str,
     format_size,
 )
+from .limiter import RateLimiter
 from .list_pop import safe_pop
 from .retry import PrivateRetry
 from .session import (
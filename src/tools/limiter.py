@@ -0,0 +1,98 @@
+from asyncio import sleep
+from hashlib import md5
+from time import monotonic
+from urllib.parse import urlparse
+
+from ..custom import RATE_LIMIT
+
+__all__ = ["RateLimiter", "TokenBucket"]
+
+
+class TokenBucket:
+    """令牌桶，令牌按当前速率补充，最多累积 burst 个；令牌不足时预支令牌并返回需要等待的时长"""
+
+    def __init__(self, rate: float, burst: int, ):
+        self.nominal = rate  # 规则设置的速率
+        self.rate = rate  # 当前每秒补充的令牌数量
+        self.burst = max(burst, 1)  # 令牌数量上限
+        self.tokens = float(self.burst)
+        self.updated = monotonic()
+        self.cooldown = 0.0  # 该时间之前不提高速率
+
+    @property
+    def interval(self) -> float:
+        """当前平均请求间隔，单位：秒"""
+        return 1 / self.rate
+
+    def adjust(self, rate: float, ):
+        self.refill(monotonic())
+        self.rate = rate
+
+    def refill(self, now: float, ):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self) -> float:
+        self.refill(monotonic())
+        self.tokens -= 1
+        return max(-self.tokens / self.rate, 0)
+
+
+class RateLimiter:
+    """获取数据请求的频率限制，按平台、接口与身份（Cookie、代理）分别维护令牌桶，所有接口对象共享；
+    响应正常时加性提高请求速率，触发风控时乘性降低请求速率"""
+    # 响应正常时每次提高的速率，为规则速率的比例
+    INCREASE = 0.05
+    # 请求速率上限，为规则速率的倍数
+    CEILING = 2
+    # 触发风控时请求速率降低的比例，连续触发时请求间隔按指数增加
+    DECREASE = 0.5
+    # 请求速率下限，单位：次/秒
+    FLOOR = 1 / 120
+    # 触发风控后暂停提高速率的时长，单位：秒
+    COOLDOWN = 60
+
+    def __init__(self, rules: dict[str, tuple[float, int]] = None, ):
+        self.rules = rules or RATE_LIMIT
+        self.buckets: dict[tuple[str, str, str], TokenBucket] = {}
+
+    @staticmethod
+    def identity(cookie: str = "", proxy: str = "", ) -> str:
+        """生成身份标识，不保存 Cookie 原文"""
+        return f"{md5(cookie.encode()).hexdigest()[:16] if cookie else ''}|{proxy or ''}"
+
+    def rule(self, platform: str, endpoint: str, ) -> tuple[float, int]:
+        """返回接口的请求频率规则，优先使用接口路径规则，其次使用平台规则与默认规则"""
+        return self.rules.get(endpoint) or self.rules.get(platform) or self.rules["default"]
+
+    def bucket(self, platform: str, endpoint: str, identity: str, ) -> TokenBucket:
+        key = (platform, endpoint, identity)
+        if not (bucket := self.buckets.get(key)):
+            bucket = self.buckets[key] = TokenBucket(*self.rule(platform, endpoint))
+        return bucket
+
+    @staticmethod
+    def split(url: str) -> tuple[str, str]:
+        url = urlparse(url)
+        return url.netloc, "/" + url.path.strip("/") + "/"
+
+    async def acquire(self, url: str, identity: str = "", ):
+        """发送请求前获取令牌，令牌不足时等待"""
+        if delay := self.bucket(*self.split(url), identity).reserve():
+            await sleep(delay)
+
+    def success(self, url: str, identity: str = "", ) -> float:
+        """记录响应正常，冷却结束后提高请求速率，返回当前请求间隔"""
+        bucket = self.bucket(*self.split(url), identity)
+        if monotonic() >= bucket.cooldown and bucket.rate < bucket.nominal * self.CEILING:
+            bucket.adjust(min(bucket.rate + bucket.nominal * self.INCREASE, bucket.nominal * self.CEILING))
+        return bucket.interval
+
+    def throttle(self, url: str, identity: str = "", ) -> float:
+        """记录触发风控，降低请求速率、清空已累积的令牌并暂停提高速率，返回当前请求间隔"""
+        bucket = self.bucket(*self.split(url), identity)
+        bucket.adjust(max(bucket.rate * self.DECREASE, self.FLOOR))
+        bucket.tokens = min(bucket.tokens, 0)
+        bucket.cooldown = monotonic() + self.COOLDOWN
+        return bucket.interval
+
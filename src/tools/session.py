@@ -9,7 +9,7 @@ from httpx import Limits
 
 from .capture import capture_error_params
 from .retry import PrivateRetry
-from ..custom import MAX_WORKERS
+from ..custom import MAX_WORKERS_GLOBAL
 from ..custom import TIMEOUT
 from ..custom import USERAGENT
 from ..tools import TikTokDownloaderError
@@ -26,7 +26,7 @@ def create_client(
         user_agent=USERAGENT,
         timeout=TIMEOUT,
         headers: dict = None,
-        max_connections=MAX_WORKERS,
+        max_connections=MAX_WORKERS_GLOBAL,
         proxy: str = None,
         *args,
         **kwargs,